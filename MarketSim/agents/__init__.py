@@ -1,7 +1,14 @@
 from .agents import MarketMaker, MomentumTrader, NoiseTrader
+from .pools import AgentPool, NoiseTraderPool, MarketMakerPool
+from .indicators import MarketHistory, RollingStats
 
 __all__=[
     "MarketMaker",
     "MomentumTrader",
-    "NoiseTrader"
+    "NoiseTrader",
+    "AgentPool",
+    "NoiseTraderPool",
+    "MarketMakerPool",
+    "MarketHistory",
+    "RollingStats"
 ]
\ No newline at end of file
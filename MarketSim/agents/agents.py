@@ -1,26 +1,36 @@
-import numpy as np
 from engine.order import Order
-import random
+from engine.ticks import TickGrid
+from engine.random_stream import RandomStream
+from .indicators import MarketHistory
 from abc import ABC, abstractmethod
-from collections import deque
 
 class BaseAgent(ABC):
-    def __init__(self, agent_id):
+    def __init__(self, agent_id, tick_size=None, rng=None):
         self.agent_id = agent_id
         self.inventory = 0
         self.balance = 0
+        self.grid = TickGrid(tick_size) if tick_size else None
+        # A RandomStream, or a seed to build one from.
+        self.rng = rng if isinstance(rng, RandomStream) else RandomStream(rng)
+
+    def quantize(self, price):
+        # Integer ticks when trading on a tick grid, otherwise a 2dp float.
+        if self.grid is not None:
+            return self.grid.to_ticks(price)
+        return max(0.01, round(price, 2))
 
     @abstractmethod
     def act(self, snapshot):
         pass
     
 class MarketMaker(BaseAgent):
-    def __init__(self, agent_id, inventory_limit=1000, skew_factor=0.01):
-        super().__init__(agent_id)
+    def __init__(self, agent_id, inventory_limit=1000, skew_factor=0.01, tick_size=None, order_ids=None, rng=None):
+        super().__init__(agent_id, tick_size, rng)
         self.inventory_limit = inventory_limit
         self.skew_factor = skew_factor
         self.active_orders = [] # REQUIRED: Track active order IDs
         self.order_counter = 0
+        self.order_ids = order_ids # Engine id allocator, e.g. MatchingEngine.next_order_id
 
     def act(self, snapshot):
         mid_price = snapshot.get('mid_price', 100.0)
@@ -43,21 +53,25 @@ class MarketMaker(BaseAgent):
         reservation_price = mid_price - (q * self.skew_factor)
         
         # Dynamic spread logic with jitter
-        target_spread = max(0.02, last_spread * random.uniform(0.9, 1.1))
+        target_spread = max(0.02, last_spread * self.rng.uniform(0.9, 1.1))
         half_spread = target_spread / 2
         
-        bid_price = max(0.01, round(reservation_price - half_spread, 2))
-        ask_price = max(0.01, round(reservation_price + half_spread, 2))
+        bid_price = self.quantize(reservation_price - half_spread)
+        ask_price = self.quantize(reservation_price + half_spread)
         
         if ask_price <= bid_price:
-            ask_price = bid_price + 0.05
+            ask_price = bid_price + (round(0.05 * self.grid.scale) if self.grid else 0.05)
         
-        qty = random.randint(1, 10)
+        qty = self.rng.randint(1, 10)
         
         # Generate Unique IDs
         self.order_counter += 1
-        bid_id = f"{self.agent_id}_{self.order_counter}_B"
-        ask_id = f"{self.agent_id}_{self.order_counter}_A"
+        if self.order_ids is not None:
+            bid_id = self.order_ids()
+            ask_id = self.order_ids()
+        else:
+            bid_id = f"{self.agent_id}_{self.order_counter}_B"
+            ask_id = f"{self.agent_id}_{self.order_counter}_A"
         
         # Place New Orders with explicit IDs
         actions.append({
@@ -82,19 +96,20 @@ class MarketMaker(BaseAgent):
         return actions
 
 class NoiseTrader(BaseAgent):
-    def __init__(self, agent_id, sigma=0.5):
-        super().__init__(agent_id)
+    def __init__(self, agent_id, sigma=0.5, tick_size=None, rng=None):
+        super().__init__(agent_id, tick_size, rng)
         self.sigma = sigma
         
     def act(self, snapshot):
         fair_value = snapshot.get('fair_value', snapshot.get('mid_price', 100.0))
         
-        side = random.choice(['buy', 'sell'])
-        trade_size = random.randint(1, 20)
+        rng = self.rng
+        side = 'buy' if rng.random() < 0.5 else 'sell'
+        trade_size = rng.randint(1, 20)
         
-        price_variation = np.random.normal(0, self.sigma)
+        price_variation = rng.normal(0, self.sigma)
         price = fair_value + price_variation if side == 'buy' else fair_value - price_variation
-        price = max(0.01, round(price, 2))
+        price = self.quantize(price)
         
         return {
             'type': 'PLACE_LIMIT',
@@ -105,19 +120,24 @@ class NoiseTrader(BaseAgent):
         }
 
 class MomentumTrader(BaseAgent):
-    def __init__(self, agent_id, window_size=50):
-        super().__init__(agent_id)
+    def __init__(self, agent_id, window_size=50, tick_size=None, rng=None, history=None):
+        super().__init__(agent_id, tick_size, rng)
         self.window_size = window_size
-        self.price_history = deque(maxlen=window_size)
+        # A shared MarketHistory is fed by the simulation driver; without one
+        # the trader keeps a private history of the mids it has seen.
+        self.own_history = history is None
+        self.history = history if history is not None else MarketHistory(window_size)
+        self.indicator = self.history.indicator(window_size)
     
     def act(self, snapshot):
         current_mid = snapshot.get('mid_price', 100.0)
-        self.price_history.append(current_mid)
+        if self.own_history:
+            self.history.push(current_mid)
         
-        if len(self.price_history) < self.window_size:
+        if not self.indicator.ready:
             return None
         
-        sma = np.mean(self.price_history)
+        sma = self.indicator.sma
         
         if current_mid > sma:
             side = 'buy'
@@ -126,7 +146,7 @@ class MomentumTrader(BaseAgent):
         else:
             return None
         
-        trade_size = random.randint(5, 15)
+        trade_size = self.rng.randint(5, 15)
         
         return {
             'type': 'PLACE_MARKET',
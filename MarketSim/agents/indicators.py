@@ -0,0 +1,132 @@
+import numpy as np
+from collections import deque
+
+class RollingStats:
+    # Running SMA / EMA / std / min / max over the last `window` values of a
+    # MarketHistory, updated in O(1) per push (min/max via monotonic deques,
+    # amortized O(1)). The running sums are recomputed from the buffer every
+    # RESYNC pushes so floating-point drift cannot accumulate.
+    RESYNC = 4096
+
+    def __init__(self, history, window):
+        self.history = history
+        self.window = window
+        self.alpha = 2.0 / (window + 1)
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.ema = None
+        self._max = deque()
+        self._min = deque()
+
+    def update(self, value, dropped):
+        n = self.count
+        self.total += value
+        self.total_sq += value * value
+        if dropped is not None:
+            self.total -= dropped
+            self.total_sq -= dropped * dropped
+        self.ema = value if self.ema is None else self.ema + self.alpha * (value - self.ema)
+
+        high = self._max
+        while high and high[-1][1] <= value:
+            high.pop()
+        high.append((n, value))
+        if high[0][0] <= n - self.window:
+            high.popleft()
+        low = self._min
+        while low and low[-1][1] >= value:
+            low.pop()
+        low.append((n, value))
+        if low[0][0] <= n - self.window:
+            low.popleft()
+
+        self.count = n + 1
+        if self.count > self.window and self.count % self.RESYNC == 0:
+            recent = self.history.last(self.window, pending=value)
+            self.total = float(recent.sum())
+            self.total_sq = float((recent * recent).sum())
+
+    @property
+    def ready(self):
+        return self.count >= self.window
+
+    @property
+    def size(self):
+        return min(self.count, self.window)
+
+    @property
+    def sma(self):
+        return self.total / self.size if self.count else None
+
+    @property
+    def std(self):
+        if not self.count:
+            return None
+        mean = self.total / self.size
+        return max(0.0, self.total_sq / self.size - mean * mean) ** 0.5
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else None
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+class MarketHistory:
+    # Shared ring buffer of market values (e.g. the mid price once per event).
+    # Agents call indicator(window) to get a RollingStats, seeded from the
+    # values already buffered; agents asking for the same window share one
+    # instance, so cost per push scales with the number of distinct windows,
+    # not with window size or agent count.
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.values = [0.0] * capacity
+        self.count = 0
+        self.length = 0
+        self.indicators = {}
+
+    def __len__(self):
+        return self.length
+
+    def indicator(self, window):
+        stats = self.indicators.get(window)
+        if stats is None:
+            if window > self.capacity:
+                self._resize(window)
+            stats = RollingStats(self, window)
+            for value in self.last(window).tolist():
+                stats.update(value, None)
+            self.indicators[window] = stats
+        return stats
+
+    def _resize(self, capacity):
+        kept = self.last(len(self)).tolist()
+        self.values = [0.0] * capacity
+        self.capacity = capacity
+        start = self.count - len(kept)
+        for i, value in enumerate(kept, start):
+            self.values[i % capacity] = value
+
+    def push(self, value):
+        n = self.count
+        cap = self.capacity
+        values = self.values
+        for window, stats in self.indicators.items():
+            stats.update(value, values[(n - window) % cap] if stats.count >= window else None)
+        values[n % cap] = value
+        self.count = n + 1
+        if self.length < cap:
+            self.length += 1
+
+    def last(self, n, pending=None):
+        # The most recent n values, oldest first. `pending` is a value being
+        # pushed that is not in the buffer yet (it counts as the newest).
+        if pending is not None:
+            tail = self.last(n - 1) if n > 1 else np.empty(0)
+            return np.append(tail, pending)
+        n = min(n, len(self))
+        end = self.count % self.capacity
+        idx = (np.arange(end - n, end)) % self.capacity
+        return np.asarray(self.values, dtype=np.float64)[idx]
@@ -0,0 +1,129 @@
+import numpy as np
+from engine.order_pool import BUY, SELL
+from engine.random_stream import RandomStream
+from engine.ticks import TickGrid
+from abc import ABC, abstractmethod
+
+class AgentPool(ABC):
+    # A population of same-type agents held as NumPy columns (parameters,
+    # inventory, balance) instead of one object per agent. act() takes the
+    # snapshot and an array of agent indices and returns the population's
+    # orders as arrays: {'agent', 'side' (BUY/SELL codes), 'price', 'qty'},
+    # plus 'cancel' ids where relevant. Subscribe on_fill to the engine to
+    # keep inventory and balance current. Integer draws are taken from
+    # uniforms; Generator.integers costs several times more per call.
+    def __init__(self, prefix, count, tick_size=None, rng=None):
+        self.agent_ids = [f"{prefix}_{i}" for i in range(count)]
+        self.index = {agent_id: i for i, agent_id in enumerate(self.agent_ids)}
+        self.inventory = np.zeros(count, dtype=np.int64)
+        self.balance = np.zeros(count, dtype=np.float64)
+        self.grid = TickGrid(tick_size) if tick_size else None
+        self.rng = rng if isinstance(rng, RandomStream) else RandomStream(rng)
+
+    def __len__(self):
+        return len(self.agent_ids)
+
+    def _column(self, value, dtype):
+        return np.array(np.broadcast_to(np.asarray(value, dtype=dtype), len(self)))
+
+    def quantize(self, prices):
+        if self.grid is not None:
+            return np.maximum(1, np.rint(prices * self.grid.scale)).astype(np.int64)
+        return np.maximum(0.01, np.round(prices, 2))
+
+    def on_fill(self, timestamp, price, qty, buyer_id, seller_id, aggressor_side):
+        i = self.index.get(buyer_id)
+        if i is not None:
+            self.inventory[i] += qty
+            self.balance[i] -= qty * price
+        i = self.index.get(seller_id)
+        if i is not None:
+            self.inventory[i] -= qty
+            self.balance[i] += qty * price
+
+    @abstractmethod
+    def act(self, snapshot, idx):
+        pass
+
+    def submit(self, engine, snapshot, idx, timestamp=0.0, cancel=True):
+        orders = self.act(snapshot, np.asarray(idx, dtype=np.int64))
+        cancel_ids = orders.get('cancel')
+        if cancel and cancel_ids is not None and len(cancel_ids):
+            engine.cancel_orders(cancel_ids.tolist(), timestamp)
+        agent_ids = self.agent_ids
+        order_ids = engine.submit_orders([agent_ids[i] for i in orders['agent'].tolist()], orders['side'].tolist(),
+                                         orders['qty'].tolist(), orders['price'].tolist(), timestamp=timestamp)
+        self.on_submitted(orders, order_ids)
+        return order_ids
+
+    def on_submitted(self, orders, order_ids):
+        pass
+
+class NoiseTraderPool(AgentPool):
+    def __init__(self, count, sigma=0.5, tick_size=None, rng=None, prefix="NT"):
+        super().__init__(prefix, count, tick_size, rng)
+        self.sigma = self._column(sigma, np.float64)
+
+    def act(self, snapshot, idx):
+        fair_value = snapshot.get('fair_value', snapshot.get('mid_price', 100.0))
+        generator = self.rng.generator
+        n = len(idx)
+
+        u = generator.random((2, n))
+        side = (u[0] * 2).astype(np.int8)
+        qty = 1 + (u[1] * 20).astype(np.int64)
+        variation = generator.standard_normal(n) * self.sigma[idx]
+        price = fair_value + np.where(side == BUY, variation, -variation)
+
+        return {'agent': idx, 'side': side, 'price': self.quantize(price), 'qty': qty}
+
+class MarketMakerPool(AgentPool):
+    # Each market maker keeps one bid and one ask; its previous quotes are
+    # cancelled whenever it acts. Order ids are issued by the engine and
+    # recorded in bid_ids/ask_ids (0 = no quote).
+    def __init__(self, count, inventory_limit=1000, skew_factor=0.01, tick_size=None, rng=None, prefix="MM"):
+        super().__init__(prefix, count, tick_size, rng)
+        self.inventory_limit = self._column(inventory_limit, np.int64)
+        self.skew_factor = self._column(skew_factor, np.float64)
+        self.bid_ids = np.zeros(count, dtype=np.int64)
+        self.ask_ids = np.zeros(count, dtype=np.int64)
+        self.min_gap = round(0.05 * self.grid.scale) if self.grid else 0.05
+
+    def act(self, snapshot, idx):
+        mid_price = snapshot.get('mid_price', 100.0)
+        last_spread = snapshot.get('spread', 0.10)
+        generator = self.rng.generator
+
+        live = np.concatenate((self.bid_ids[idx], self.ask_ids[idx]))
+        cancel = live[live != 0]
+        self.bid_ids[idx] = 0
+        self.ask_ids[idx] = 0
+
+        q = self.inventory[idx]
+        quoting = idx[np.abs(q) < self.inventory_limit[idx]]
+        n = len(quoting)
+
+        reservation_price = mid_price - self.inventory[quoting] * self.skew_factor[quoting]
+        u = generator.random((2, n))
+        target_spread = np.maximum(0.02, last_spread * (0.9 + 0.2 * u[0]))
+        half_spread = target_spread / 2
+
+        bid_price = self.quantize(reservation_price - half_spread)
+        ask_price = self.quantize(reservation_price + half_spread)
+        ask_price = np.where(ask_price <= bid_price, bid_price + self.min_gap, ask_price)
+        qty = 1 + (u[1] * 10).astype(np.int64)
+
+        # Interleaved bid, ask per agent, the order a MarketMaker submits in.
+        return {
+            'cancel': cancel,
+            'agent': np.repeat(quoting, 2),
+            'side': np.tile(np.array([BUY, SELL], dtype=np.int8), n),
+            'price': np.column_stack((bid_price, ask_price)).ravel(),
+            'qty': np.repeat(qty, 2)
+        }
+
+    def on_submitted(self, orders, order_ids):
+        ids = np.asarray(order_ids, dtype=np.int64)
+        quoting = orders['agent'][::2]
+        self.bid_ids[quoting] = ids[::2]
+        self.ask_ids[quoting] = ids[1::2]
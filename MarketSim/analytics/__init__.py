@@ -1,11 +1,15 @@
 from .tape import Tape
-from .metrics import MarketMetrics
+from .metrics import MarketMetrics, StreamingMetrics
 from .plots import MarketPlots
 from .snapshots import SnapshotRecorder
+from .store import RunWriter, RunReader
 
 __all__ = [
     "Tape",
     "MarketMetrics",
+    "StreamingMetrics",
     "MarketPlots",
-    "SnapshotRecorder"
+    "SnapshotRecorder",
+    "RunWriter",
+    "RunReader"
 ]
\ No newline at end of file
@@ -1,24 +1,50 @@
 import pandas as pd
 import numpy as np
+from collections import deque
 from .tape import Tape
 
 class MarketMetrics:
+    # Lazy sources (RunReader.trades / .snapshots) are read column by column:
+    # each metric loads only the columns it uses.
     def __init__(self, data_source):
-        if hasattr(data_source, 'to_dataframe'):
-            self.df = data_source.to_dataframe()
+        self.source = None
+        self._df = None
+        if getattr(data_source, 'lazy', False):
+            self.source = data_source
+        elif hasattr(data_source, 'to_dataframe'):
+            self._df = data_source.to_dataframe()
         elif isinstance(data_source, pd.DataFrame):
-            self.df = data_source
+            self._df = data_source
         else:
-            self.df = pd.DataFrame()
+            self._df = pd.DataFrame()
+
+    @property
+    def df(self):
+        if self._df is None:
+            self._df = self._frame(None)
+        return self._df
+
+    def _frame(self, columns):
+        if self._df is not None:
+            return self._df
+        if hasattr(self.source, 'get_l1_dataframe'):
+            return self.source.get_l1_dataframe(columns=columns)
+        return self.source.to_dataframe(columns=columns)
+
+    def _has(self, column):
+        if self._df is not None:
+            return column in self._df.columns
+        return column in self.source.columns
 
     def compute_vwap(self):
-        if self.df.empty:
+        if not self._has('price') or not self._has('qty'):
+            return None if self._frame(['timestamp']).empty else 0.0
+        df = self._frame(['price', 'qty'])
+        if df.empty:
             return None
-        if 'price' not in self.df.columns or 'qty' not in self.df.columns:
-            return 0.0
             
-        total_dollar_volume = (self.df['price'] * self.df['qty']).sum()
-        total_volume = self.df['qty'].sum()
+        total_dollar_volume = (df['price'] * df['qty']).sum()
+        total_volume = df['qty'].sum()
         
         if total_volume == 0:
             return 0.0
@@ -30,18 +56,19 @@ class MarketMetrics:
         return self.compute_vwap()
 
     def get_session_volatility(self):
-        if self.df.empty:
-            return 0.0
-            
-        price_col = 'mid_price' if 'mid_price' in self.df.columns else 'price'
+        price_col = 'mid_price' if self._has('mid_price') else 'price'
         
-        if price_col not in self.df.columns:
+        if not self._has(price_col):
             return 0.0
 
-        if isinstance(self.df.index, pd.DatetimeIndex):
-            resampled = self.df[price_col].resample('1s').last().dropna()
+        df = self._frame([price_col])
+        if df.empty:
+            return 0.0
+
+        if isinstance(df.index, pd.DatetimeIndex):
+            resampled = df[price_col].resample('1s').last().dropna()
         else:
-            resampled = self.df[price_col]
+            resampled = df[price_col]
 
         if len(resampled) < 2:
             return 0.0
@@ -54,10 +81,117 @@ class MarketMetrics:
         return self.get_session_volatility()
     
     def get_rolling_volatility(self, window_size=60):
-        if self.df.empty or 'mid_price' not in self.df.columns:
+        if not self._has('mid_price'):
+            return None
+        df = self._frame(['mid_price'])
+        if df.empty:
             return None
         
-        resampled_mid = self.df['mid_price'].resample('1s').last().dropna()
+        resampled_mid = df['mid_price'].resample('1s').last().dropna()
         log_returns = np.log(resampled_mid / resampled_mid.shift(1)).dropna()
         rolling_volatility = log_returns.rolling(window=window_size).std()
-        return rolling_volatility
\ No newline at end of file
+        return rolling_volatility
+
+class StreamingMetrics:
+    # Online counterpart of MarketMetrics, updated in O(1) per fill and per
+    # snapshot: subscribe on_fill to the MatchingEngine and on_snapshot to a
+    # SnapshotRecorder. Mids are bucketed to the last value per 1 s, like
+    # resample('1s').last(); log returns between buckets feed a Welford
+    # accumulator (session volatility) and a window of the most recent
+    # returns (rolling volatility). The open bucket's return is kept aside
+    # until the bucket closes, so queries can be made at any time.
+    def __init__(self, window_size=60):
+        self.window_size = window_size
+        self.trade_count = 0
+        self.volume = 0
+        self.dollar_volume = 0.0
+        self.snapshot_count = 0
+        self.spread_total = 0.0
+        self.bucket = None
+        self.bucket_mid = None
+        self.prev_mid = None
+        self.n_returns = 0
+        self.mean_return = 0.0
+        self.m2 = 0.0
+        self.recent_returns = deque(maxlen=window_size)
+
+    def on_fill(self, timestamp, price, qty, buyer_id, seller_id, aggressor_side):
+        self.trade_count += 1
+        self.volume += qty
+        self.dollar_volume += price * qty
+
+    def on_snapshot(self, timestamp, snapshot):
+        self.snapshot_count += 1
+        self.spread_total += snapshot['spread']
+
+        mid = snapshot['mid_price']
+        if mid != mid:
+            return
+        bucket = int(timestamp // 1)
+        if bucket != self.bucket:
+            self._close_bucket()
+            self.bucket = bucket
+        self.bucket_mid = mid
+
+    def _close_bucket(self):
+        if self.bucket_mid is None:
+            return
+        if self.prev_mid is not None:
+            r = np.log(self.bucket_mid / self.prev_mid)
+            self.n_returns += 1
+            delta = r - self.mean_return
+            self.mean_return += delta / self.n_returns
+            self.m2 += delta * (r - self.mean_return)
+            self.recent_returns.append(r)
+        self.prev_mid = self.bucket_mid
+        self.bucket_mid = None
+
+    def _pending_return(self):
+        if self.bucket_mid is None or self.prev_mid is None:
+            return None
+        return np.log(self.bucket_mid / self.prev_mid)
+
+    def compute_vwap(self):
+        if not self.trade_count:
+            return None
+        if self.volume == 0:
+            return 0.0
+        return self.dollar_volume / self.volume
+
+    def get_session_volatility(self):
+        n, mean, m2 = self.n_returns, self.mean_return, self.m2
+        r = self._pending_return()
+        if r is not None:
+            n += 1
+            delta = r - mean
+            mean += delta / n
+            m2 += delta * (r - mean)
+        if n == 0:
+            return 0.0
+        if n == 1:
+            return float('nan')
+        return float(np.sqrt(m2 / (n - 1)))
+
+    def get_rolling_volatility(self):
+        # Latest value of MarketMetrics.get_rolling_volatility(window_size).
+        returns = list(self.recent_returns)
+        r = self._pending_return()
+        if r is not None:
+            returns.append(r)
+        returns = returns[-self.window_size:]
+        if len(returns) < max(self.window_size, 2):
+            return float('nan')
+        return float(np.std(returns, ddof=1))
+
+    def get_average_spread(self):
+        return self.spread_total / self.snapshot_count if self.snapshot_count else float('nan')
+
+    def summary(self):
+        return {
+            'vwap': self.compute_vwap(),
+            'volatility': self.get_session_volatility(),
+            'rolling_volatility': self.get_rolling_volatility(),
+            'avg_spread': self.get_average_spread(),
+            'volume': self.volume,
+            'fill_count': self.trade_count,
+        }
@@ -1,39 +1,98 @@
+import numpy as np
 import pandas as pd
 import mplfinance as mpf
 import matplotlib.pyplot as plt
 from .metrics import MarketMetrics
 
+OHLC_AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'}
+
+def minmax_decimate(values, buckets):
+    # Indices of the min and max of each of `buckets` equal slices, plus the
+    # endpoints, in order: a line through them has the same envelope as the
+    # full series at one bucket per pixel.
+    n = len(values)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    size = -(-n // buckets)
+    rows = -(-n // size)
+    padded = np.full(rows * size, np.nan)
+    padded[:n] = values
+    padded = padded.reshape(rows, size)
+    offsets = np.arange(rows) * size
+    keep = np.concatenate((
+        [0, n - 1],
+        offsets + np.nanargmin(padded, axis=1),
+        offsets + np.nanargmax(padded, axis=1),
+    ))
+    return np.unique(keep)
+
+def build_ohlc(series, resolutions):
+    # 1s bars from the raw series once; coarser bars are aggregated from them.
+    bars = {resolutions[0]: series.resample(resolutions[0]).ohlc().dropna()}
+    for freq in resolutions[1:]:
+        bars[freq] = bars[resolutions[0]].resample(freq).agg(OHLC_AGG).dropna()
+    return bars
+
 class MarketPlots:
-    def __init__(self, recorder, tape):
+    # Report pages are built in two steps: prepare_report() reduces the L1
+    # series to what is drawn (OHLC bars at each resolution, the spread
+    # decimated to `max_points`) and render_report() draws that onto a page.
+    # The prepared report is small and picklable, so it can be computed in a
+    # worker process.
+    RESOLUTIONS = ('1s', '30s', '5min')
+
+    def __init__(self, recorder, tape, max_points=2000):
         self.recorder = recorder
         self.tape = tape
+        self.max_points = max_points
 
     def generate_scenario_report(self, pdf, scenario_name):
+        report = self.prepare_report(scenario_name)
+        if report is not None:
+            self.render_report(pdf, report)
+
+    def prepare_report(self, scenario_name):
         print(f"Generating report for: {scenario_name}...")
         
-        df_l1 = self.recorder.get_l1_dataframe()
+        df_l1 = self.recorder.get_l1_dataframe(columns=['mid_price', 'spread'])
         
         if df_l1.empty:
             print(f"Warning: No data found for {scenario_name}.")
-            return
+            return None
 
         if len(df_l1) > 100:
             df_l1 = df_l1.iloc[50:]
         
         try:
             duration = (df_l1.index[-1] - df_l1.index[0]).total_seconds()
-            freq = '30s' if duration > 600 else '1s'
-            ohlc = df_l1['mid_price'].resample(freq).ohlc().dropna()
+            freq = '5min' if duration > 4 * 3600 else '30s' if duration > 600 else '1s'
+            bars = build_ohlc(df_l1['mid_price'], self.RESOLUTIONS)
         except Exception as e:
             print(f"Resampling error: {e}")
-            return
+            return None
 
-        if ohlc.empty:
-            return
+        if bars[freq].empty:
+            return None
 
-        avg_spread = df_l1['spread'].mean()
+        spread = df_l1['spread']
         returns = df_l1['mid_price'].pct_change().dropna()
-        volatility = returns.std() * (len(df_l1)**0.5) if not returns.empty else 0.0
+        keep = minmax_decimate(spread.to_numpy(), self.max_points // 2)
+        return {
+            'scenario_name': scenario_name,
+            'freq': freq,
+            'bars': bars,
+            'avg_spread': spread.mean(),
+            'volatility': returns.std() * (len(df_l1)**0.5) if not returns.empty else 0.0,
+            'spread': spread.iloc[keep],
+            'robust_max': spread.quantile(0.95),
+        }
+
+    @staticmethod
+    def render_report(pdf, report):
+        scenario_name = report['scenario_name']
+        freq = report['freq']
+        ohlc = report['bars'][freq]
+        spread = report['spread']
 
         fig = plt.figure(figsize=(11, 8.5))
         gs = fig.add_gridspec(3, 1, height_ratios=[0.15, 2, 1], hspace=0.35)
@@ -41,7 +100,7 @@ class MarketPlots:
         ax_header = fig.add_subplot(gs[0])
         ax_header.axis('off')
         ax_header.text(0.5, 0.75, f"{scenario_name}", ha='center', va='center', fontsize=16, fontweight='bold', color='#333')
-        ax_header.text(0.5, 0.25, f"Avg Spread: ${avg_spread:.4f}  |  Realized Vol: {volatility:.4f}", 
+        ax_header.text(0.5, 0.25, f"Avg Spread: ${report['avg_spread']:.4f}  |  Realized Vol: {report['volatility']:.4f}", 
                        ha='center', va='center', fontsize=12, color='#555')
 
         ax1 = fig.add_subplot(gs[1])
@@ -54,11 +113,10 @@ class MarketPlots:
                  axtitle=f'Mid-Price Dynamics ({freq} Candles)')
 
         ax2 = fig.add_subplot(gs[2], sharex=ax1)
-        ax2.plot(df_l1.index, df_l1['spread'], color='#ff7f0e', linewidth=1.0, label='Spread')
-        ax2.fill_between(df_l1.index, df_l1['spread'], color='#ff7f0e', alpha=0.2)
+        ax2.plot(spread.index, spread, color='#ff7f0e', linewidth=1.0, label='Spread')
+        ax2.fill_between(spread.index, spread, color='#ff7f0e', alpha=0.2)
         
-        robust_max = df_l1['spread'].quantile(0.95)
-        view_limit = max(0.10, robust_max * 1.5)
+        view_limit = max(0.10, report['robust_max'] * 1.5)
         
         ax2.set_ylim(0, view_limit)
         ax2.set_title("Bid-Ask Spread Stress (Robust)", fontsize=10, fontweight='bold', loc='left')
@@ -69,4 +127,4 @@ class MarketPlots:
 
         pdf.savefig(fig)
         plt.close(fig)
-        print(f"Successfully saved page for {scenario_name}")
\ No newline at end of file
+        print(f"Successfully saved page for {scenario_name}")
@@ -1,42 +1,124 @@
+import numpy as np
 import pandas as pd
-import heapq
 from engine.matching_engine import MatchingEngine
 
 class SnapshotRecorder:
-    def __init__(self):
-        self.l1_snapshots = []
-        self.l2_snapshots = []
+    # Preallocated, growable arrays: one column per L1 field and
+    # (n_ticks, depth, 2) matrices of (price, qty) for each side of the L2.
+    # Levels missing from the book are stored as (nan, 0). Callbacks added with
+    # subscribe() get (timestamp, l1_data) for every recorded snapshot. With a
+    # sink (e.g. a RunWriter) each full chunk is written out and dropped, and
+    # the frames only cover the rows still in memory.
+    L1_COLUMNS = ('best_bid', 'best_ask', 'mid_price', 'spread', 'timestamp')
+
+    def __init__(self, depth=5, chunk_size=4096, sink=None):
+        self.depth = depth
+        self.chunk_size = chunk_size
+        self.sink = sink
+        self.offset = 0
+        self.size = 0
+        self.capacity = chunk_size
+        self.l1 = {name: np.empty(chunk_size) for name in self.L1_COLUMNS}
+        self.bids = np.empty((chunk_size, depth, 2))
+        self.asks = np.empty((chunk_size, depth, 2))
+        self.subscribers = []
+
+    def __len__(self):
+        return self.offset + self.size
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['l1'] = {name: column[:self.size].copy() for name, column in self.l1.items()}
+        state['bids'] = self.bids[:self.size].copy()
+        state['asks'] = self.asks[:self.size].copy()
+        state['capacity'] = self.size
+        return state
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def flush(self):
+        if self.sink is None or not self.size:
+            return
+        n = self.size
+        self.sink.write_snapshots({name: column[:n] for name, column in self.l1.items()},
+                                  self.bids[:n], self.asks[:n])
+        self.offset += n
+        self.size = 0
+
+    def _grow(self):
+        self.capacity += max(self.chunk_size, self.capacity)
+        for name, column in self.l1.items():
+            grown = np.empty(self.capacity)
+            grown[:self.size] = column[:self.size]
+            self.l1[name] = grown
+        for name in ('bids', 'asks'):
+            grown = np.empty((self.capacity, self.depth, 2))
+            grown[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, grown)
+
+    def _write_levels(self, matrix, i, levels):
+        n = len(levels)
+        if n:
+            matrix[i, :n] = levels
+        if n < self.depth:
+            matrix[i, n:, 0] = np.nan
+            matrix[i, n:, 1] = 0
 
     def record_snapshot(self, engine: MatchingEngine, timestamp):
+        if self.size == self.capacity:
+            if self.sink is not None:
+                self.flush()
+            else:
+                self._grow()
+        i = self.size
+
         l1_data = engine.get_snapshot()
         l1_data['timestamp'] = timestamp
-        self.l1_snapshots.append(l1_data)
-
-        depth = 5
-        
-        best_bids = heapq.nsmallest(depth, engine.bids)
-        best_asks = heapq.nsmallest(depth, engine.asks)
-        
-        bids_l2 = [(-p, o.qty) for p, t, o in best_bids]
-        asks_l2 = [(p, o.qty) for p, t, o in best_asks]
-
-        self.l2_snapshots.append({
-            'timestamp': timestamp,
-            'bids': bids_l2,
-            'asks': asks_l2
-        })
-
-        return l1_data['mid_price'], l1_data['spread'], self.l1_snapshots[-1], self.l2_snapshots[-1]
-
-    def get_l1_dataframe(self):
-        df = pd.DataFrame(self.l1_snapshots)
-        if not df.empty and 'timestamp' in df.columns:
-            df['datetime'] = pd.to_datetime(df['timestamp'], unit='s')
-            df.set_index('datetime', inplace=True)
+        if engine.flow_log is not None:
+            engine.flow_log.mark_recorded(timestamp, self.depth)
+        for name, column in self.l1.items():
+            column[i] = l1_data[name]
+
+        l2_data = engine.get_depth(self.depth)
+        l2_data['timestamp'] = timestamp
+        self._write_levels(self.bids, i, l2_data['bids'])
+        self._write_levels(self.asks, i, l2_data['asks'])
+
+        self.size = i + 1
+        for callback in self.subscribers:
+            callback(timestamp, l1_data)
+        return l1_data['mid_price'], l1_data['spread'], l1_data, l2_data
+
+    @property
+    def l1_snapshots(self):
+        return self.get_l1_dataframe().to_dict('records')
+
+    @property
+    def l2_snapshots(self):
+        snapshots = []
+        for i in range(self.size):
+            snapshots.append({
+                'bids': [(p, int(q)) for p, q in self.bids[i] if q > 0],
+                'asks': [(p, int(q)) for p, q in self.asks[i] if q > 0],
+                'timestamp': self.l1['timestamp'][i]
+            })
+        return snapshots
+
+    def get_l1_dataframe(self, columns=None):
+        columns = self.L1_COLUMNS if columns is None else columns
+        df = pd.DataFrame({name: self.l1[name][:self.size] for name in columns}, copy=False)
+        if not df.empty:
+            df.index = pd.DatetimeIndex(pd.to_datetime(self.l1['timestamp'][:self.size], unit='s'), name='datetime')
         return df
-    
+
     def get_l2_dataframe(self):
-        df = pd.DataFrame(self.l2_snapshots)
-        if not df.empty and 'timestamp' in df.columns:
+        columns = {'timestamp': self.l1['timestamp'][:self.size]}
+        for side, matrix in (('bid', self.bids), ('ask', self.asks)):
+            for level in range(self.depth):
+                columns[f'{side}_price_{level}'] = matrix[:self.size, level, 0]
+                columns[f'{side}_qty_{level}'] = matrix[:self.size, level, 1]
+        df = pd.DataFrame(columns, copy=False)
+        if not df.empty:
             df['datetime'] = pd.to_datetime(df['timestamp'], unit='s')
-        return df
\ No newline at end of file
+        return df
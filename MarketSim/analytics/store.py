@@ -0,0 +1,145 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from engine.trade_tape import AGGRESSOR_SIDES
+from .snapshots import SnapshotRecorder
+
+class RunWriter:
+    # On-disk sink for a run. A TradeTape or SnapshotRecorder built with
+    # sink=writer hands over its rows each time its in-memory chunk fills, so
+    # memory stays at one chunk however long the session. Every chunk is
+    # stored as one .npy shard per column:
+    #   trades/<column>.<k>.npy, l1/<column>.<k>.npy, l2/{bids,asks}.<k>.npy
+    # close() writes meta.json, which is what RunReader opens.
+    def __init__(self, directory):
+        self.directory = directory
+        for sub in ('trades', 'l1', 'l2'):
+            os.makedirs(os.path.join(directory, sub), exist_ok=True)
+        self.trade_chunks = []
+        self.snapshot_chunks = []
+        self.agent_ids = []
+        self.depth = None
+
+    def _save(self, sub, name, k, array):
+        np.save(os.path.join(self.directory, sub, f"{name}.{k}.npy"), np.ascontiguousarray(array))
+
+    def write_trades(self, columns, agent_ids):
+        k = len(self.trade_chunks)
+        for name, column in columns.items():
+            self._save('trades', name, k, column)
+        self.trade_chunks.append(len(columns['timestamp']))
+        self.agent_ids = list(agent_ids)
+
+    def write_snapshots(self, l1, bids, asks):
+        k = len(self.snapshot_chunks)
+        for name, column in l1.items():
+            self._save('l1', name, k, column)
+        self._save('l2', 'bids', k, bids)
+        self._save('l2', 'asks', k, asks)
+        self.snapshot_chunks.append(len(bids))
+        self.depth = bids.shape[1]
+
+    def close(self, tape=None, recorder=None):
+        # Flushes whatever the tape and recorder still hold, then writes meta.
+        if tape is not None:
+            tape.flush()
+        if recorder is not None:
+            recorder.flush()
+        meta = {
+            'trade_chunks': self.trade_chunks,
+            'snapshot_chunks': self.snapshot_chunks,
+            'agent_ids': self.agent_ids,
+            'depth': self.depth,
+        }
+        with open(os.path.join(self.directory, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+class _Shards:
+    # Column reads over one shard directory. Shards are memory-mapped and only
+    # the requested columns are touched.
+    def __init__(self, directory, sub, chunks):
+        self.path = os.path.join(directory, sub)
+        self.chunks = chunks
+
+    def __len__(self):
+        return sum(self.chunks)
+
+    def iter_column(self, name):
+        for k, rows in enumerate(self.chunks):
+            if rows:
+                yield np.load(os.path.join(self.path, f"{name}.{k}.npy"), mmap_mode='r')
+
+    def column(self, name):
+        parts = list(self.iter_column(name))
+        return np.concatenate(parts) if parts else np.empty(0)
+
+class TradeShards(_Shards):
+    # Read-only stand-in for a Tape: to_dataframe() returns the same frame,
+    # restricted to `columns` when given.
+    lazy = True
+    columns = ('timestamp', 'price', 'qty', 'buyer', 'seller', 'aggressor')
+
+    def __init__(self, directory, chunks, agent_ids):
+        super().__init__(directory, 'trades', chunks)
+        self.agent_ids = agent_ids
+
+    def to_dataframe(self, cursor=0, columns=None):
+        columns = self.columns if columns is None else columns
+        data = {}
+        for name in columns:
+            values = self.column(name)[cursor:]
+            if name in ('buyer', 'seller'):
+                values = pd.Categorical.from_codes(values, categories=list(self.agent_ids))
+            elif name == 'aggressor':
+                values = pd.Categorical.from_codes(values, categories=AGGRESSOR_SIDES)
+            data[name] = values
+        df = pd.DataFrame(data, copy=False)
+        if not df.empty and 'timestamp' in df.columns:
+            df['datetime'] = pd.to_datetime(df['timestamp'], unit='s')
+        return df
+
+class SnapshotShards(_Shards):
+    # Read-only stand-in for a SnapshotRecorder (L1 and L2 frames).
+    lazy = True
+    columns = SnapshotRecorder.L1_COLUMNS
+
+    def __init__(self, directory, chunks, depth):
+        super().__init__(directory, 'l1', chunks)
+        self.l2_path = os.path.join(directory, 'l2')
+        self.depth = depth
+
+    def get_l1_dataframe(self, columns=None):
+        columns = self.columns if columns is None else columns
+        df = pd.DataFrame({name: self.column(name) for name in columns}, copy=False)
+        if not df.empty:
+            timestamps = df['timestamp'] if 'timestamp' in df.columns else self.column('timestamp')
+            df.index = pd.DatetimeIndex(pd.to_datetime(timestamps, unit='s'), name='datetime')
+        return df
+
+    def levels(self, side):
+        parts = [np.load(os.path.join(self.l2_path, f"{side}.{k}.npy"), mmap_mode='r')
+                 for k, rows in enumerate(self.chunks) if rows]
+        return np.concatenate(parts) if parts else np.empty((0, self.depth or 0, 2))
+
+    def get_l2_dataframe(self):
+        columns = {'timestamp': self.column('timestamp')}
+        for side, matrix in (('bid', self.levels('bids')), ('ask', self.levels('asks'))):
+            for level in range(matrix.shape[1]):
+                columns[f'{side}_price_{level}'] = matrix[:, level, 0]
+                columns[f'{side}_qty_{level}'] = matrix[:, level, 1]
+        df = pd.DataFrame(columns, copy=False)
+        if not df.empty:
+            df['datetime'] = pd.to_datetime(df['timestamp'], unit='s')
+        return df
+
+class RunReader:
+    # Opens a run directory written by RunWriter. Nothing is loaded until a
+    # frame or column is requested; MarketMetrics and MarketPlots accept
+    # `trades` and `snapshots` in place of a Tape and SnapshotRecorder.
+    def __init__(self, directory):
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        self.directory = directory
+        self.trades = TradeShards(directory, meta['trade_chunks'], meta['agent_ids'])
+        self.snapshots = SnapshotShards(directory, meta['snapshot_chunks'], meta['depth'])
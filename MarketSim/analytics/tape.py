@@ -1,23 +1,16 @@
 import pandas as pd
-from engine.order import Trade
-
-class Tape:
-    def __init__(self):
-        self.trades = []
+from engine.trade_tape import TradeTape
 
+class Tape(TradeTape):
     def log_trade(self,timestamp, price, qty, buyer, seller, aggressor):
-        self.trades.append({
-            'timestamp': timestamp,
-            'price': price,
-            'qty': qty,
-            'buyer': buyer,
-            'seller': seller,
-            'aggressor': aggressor
+        self.append(timestamp, price, qty, buyer, seller, aggressor)
+
+    def to_dataframe(self, cursor=0):
+        df = super().to_dataframe(cursor).rename(columns={
+            'buyer_id': 'buyer',
+            'seller_id': 'seller',
+            'aggressor_side': 'aggressor'
         })
-    def to_dataframe(self):
-        df=pd.DataFrame(self.trades)
         if not df.empty:
             df['datetime'] = pd.to_datetime(df['timestamp'], unit='s')
         return df
-    def record_trade(self, trade: Trade):
-        self.trades.append(trade.to_dict())
\ No newline at end of file
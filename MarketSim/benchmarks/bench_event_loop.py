@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.event_loop import EventLoop, CalendarEventLoop
+
+# Hold model: `pending` recurring processes each reschedule themselves after
+# an exponential delay, so the queue stays at `pending` near-future events.
+# Reports events per second for the heap and the calendar queue.
+
+def run_hold(loop, pending, events, mean_delay, seed=0):
+    delays = np.random.default_rng(seed).exponential(mean_delay, events + pending).tolist()
+    delays.reverse()
+    counter = [0]
+
+    def process():
+        counter[0] += 1
+        return delays.pop()
+
+    for _ in range(pending):
+        loop.schedule_recurring(delays.pop(), process)
+    start = time.perf_counter()
+    while counter[0] < events and loop.process_next_event():
+        pass
+    return counter[0] / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="EventLoop backend benchmark (hold model)")
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--mean-delay', type=float, default=0.1)
+    parser.add_argument('--pending', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--widths', type=float, nargs='+', default=[0.01, 0.1, 1.0])
+    args = parser.parse_args()
+
+    print(f"{'pending':>8} {'backend':>16} {'events/s':>12}")
+    for pending in args.pending:
+        rate = run_hold(EventLoop(), pending, args.events, args.mean_delay)
+        print(f"{pending:>8} {'heap':>16} {rate:>12,.0f}")
+        for width in args.widths:
+            rate = run_hold(CalendarEventLoop(bucket_width=width), pending, args.events, args.mean_delay)
+            print(f"{pending:>8} {f'calendar w={width:g}':>16} {rate:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
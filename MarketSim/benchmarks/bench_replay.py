@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.flow_log import OrderFlowLog, replay_log
+from run_simulation import SCENARIOS, simulate_scenario
+
+# Engine throughput on realistic order flow: each scenario is simulated once
+# with an OrderFlowLog, then the log is replayed through a fresh
+# MatchingEngine (no agents, event loop or RNG). Reports log rows per second;
+# with --log an existing log file is replayed instead.
+
+def time_replay(log, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        replay_log(log)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="MatchingEngine replay benchmark")
+    parser.add_argument('--log', default=None, help="replay this saved OrderFlowLog instead of simulating")
+    parser.add_argument('--save', default=None, help="directory to save the scenario logs in")
+    parser.add_argument('--duration', type=float, default=3600.0)
+    parser.add_argument('--book-type', default='ladder')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.log is not None:
+        logs = [(os.path.basename(args.log), OrderFlowLog.load(args.log))]
+    else:
+        logs = []
+        for i, (name, n, mm, mom) in enumerate(SCENARIOS):
+            log = OrderFlowLog()
+            simulate_scenario(name, n, mm, mom, book_type=args.book_type, duration=args.duration,
+                              verbose=False, flow_log=log)
+            if args.save is not None:
+                os.makedirs(args.save, exist_ok=True)
+                log.save(os.path.join(args.save, f"scenario_{i}.npz"))
+            logs.append((name, log))
+
+    print(f"{'log':<36} {'rows':>9} {'orders':>9} {'seconds':>9} {'rows/s':>12}")
+    for name, log in logs:
+        counts = log.counts()
+        seconds = time_replay(log, args.repeat)
+        print(f"{name:<36} {len(log):>9} {counts['submit']:>9} {seconds:>9.3f} {len(log) / seconds:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
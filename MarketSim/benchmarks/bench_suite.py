@@ -0,0 +1,313 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_pdf import PdfPages
+
+from bench_event_loop import run_hold
+from engine.event_loop import EventLoop, CalendarEventLoop
+from engine.matching_engine import MatchingEngine
+from engine.order import Order
+from environment.market_environment import GymTradingEnvironment
+from run_simulation import SCENARIOS, run_scenario
+
+# Fixed-seed benchmark suite. Each run records its metrics, keyed by the git
+# commit, in results.jsonl and compares them with the latest earlier record
+# (or --baseline COMMIT). A metric that is worse than the baseline by more
+# than its budget (a fraction: per metric via --budget-file, else --budget,
+# else the group's default) is reported and the suite exits with status 1.
+#
+# Metrics are (unit, higher_is_better). Timings are the best of --repeat.
+METRICS = {
+    'engine.limit_heavy': ('orders/s', True),
+    'engine.market_heavy': ('orders/s', True),
+    'engine.cancel_heavy': ('ops/s', True),
+    'engine.snapshot_us.depth_10': ('us', False),
+    'engine.snapshot_us.depth_1000': ('us', False),
+    'engine.snapshot_us.depth_100000': ('us', False),
+    'loop.heap': ('events/s', True),
+    'loop.calendar': ('events/s', True),
+    'env.reset_cold': ('resets/s', True),
+    'env.reset_warm': ('resets/s', True),
+    'env.step': ('steps/s', True),
+    'scenario.A': ('s', False),
+    'scenario.B': ('s', False),
+    'scenario.C': ('s', False),
+}
+
+# Default budgets per group. Event-loop, env and scenario timings run whole
+# Python call paths and vary more between runs than the engine kernels.
+GROUP_BUDGETS = {'engine': 0.2, 'loop': 0.3, 'env': 0.3, 'scenario': 0.3}
+
+def best_of(repeat, fn, setup=None):
+    # With setup, each run gets fn(setup()) and setup is not timed (e.g. to
+    # build fresh orders, since the engine consumes the ones it fills).
+    best = float('inf')
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def make_engine():
+    return MatchingEngine(tick_size=0.01)
+
+def limit_quotes(n, seed):
+    # (agent, side, qty, price, order_type, order_id) for limit orders
+    # scattered around 100.00; about a third cross.
+    rng = np.random.default_rng(seed)
+    sides = rng.random(n) < 0.5
+    offsets = np.rint(rng.normal(0, 25, n)).astype(int).tolist()
+    qtys = rng.integers(1, 20, n).tolist()
+    return [(f"A_{i % 100}", 'buy' if buy else 'sell', q, (10000 - 5 + o if buy else 10000 + 5 - o) / 100,
+             'limit', i + 1)
+            for i, (buy, o, q) in enumerate(zip(sides.tolist(), offsets, qtys))]
+
+def make_orders(quotes):
+    return [Order(agent, side, qty, price, order_type, order_id=order_id)
+            for agent, side, qty, price, order_type, order_id in quotes]
+
+def bench_limit_heavy(n, repeat, seed):
+    quotes = limit_quotes(n, seed)
+
+    def run(orders):
+        engine = make_engine()
+        for order in orders:
+            engine.add_order(order)
+    return n / best_of(repeat, run, lambda: make_orders(quotes))
+
+def bench_market_heavy(n, repeat, seed):
+    # 70% market orders against a book replenished by the other 30%, after a
+    # book of 2000 limit orders.
+    rng = np.random.default_rng(seed)
+    kinds = (rng.random(n) < 0.7).tolist()
+    sides = (rng.random(n) < 0.5).tolist()
+    qtys = rng.integers(1, 20, n).tolist()
+    refill = iter(limit_quotes(n, seed + 1))
+    quotes = limit_quotes(2000, seed + 2)
+    for i, (market, buy, q) in enumerate(zip(kinds, sides, qtys)):
+        if market:
+            quotes.append((f"M_{i % 100}", 'buy' if buy else 'sell', q, None, 'market', n + 10000 + i))
+        else:
+            *quote, order_id = next(refill)
+            quotes.append((*quote, order_id + 2 * n))
+
+    def run(orders):
+        engine = make_engine()
+        for order in orders:
+            engine.add_order(order)
+    return n / best_of(repeat, run, lambda: make_orders(quotes))
+
+def bench_cancel_heavy(n, repeat, seed):
+    # Market makers requoting: every step cancels a maker's two quotes and
+    # places two new ones (MarketMaker.act), so n steps are 4n engine ops.
+    rng = np.random.default_rng(seed)
+    makers = rng.integers(0, 50, n).tolist()
+    mids = (10000 + np.cumsum(rng.choice([-1, 0, 1], n))).tolist()
+    half = rng.integers(1, 5, n).tolist()
+    steps = []
+    quotes = {}
+    for i, (m, mid, h) in enumerate(zip(makers, mids, half)):
+        steps.append((quotes.get(m, ()), (f"MM_{m}", 'buy', 5, (mid - h) / 100, 'limit', 2 * i + 1),
+                      (f"MM_{m}", 'sell', 5, (mid + h) / 100, 'limit', 2 * i + 2)))
+        quotes[m] = (2 * i + 1, 2 * i + 2)
+
+    def setup():
+        return [(cancels, *make_orders([bid, ask])) for cancels, bid, ask in steps]
+
+    def run(requotes):
+        engine = make_engine()
+        for cancels, bid, ask in requotes:
+            for order_id in cancels:
+                engine.cancel_order(order_id)
+            engine.add_order(bid)
+            engine.add_order(ask)
+    return 4 * n / best_of(repeat, run, setup)
+
+def bench_snapshot(levels, calls, repeat):
+    # get_snapshot latency on a book with `levels` price levels per side,
+    # centred far enough above tick 0 that every bid level is distinct.
+    engine = make_engine()
+    mid = levels + 10000
+    for i in range(levels):
+        engine.add_order(Order("B", 'buy', 1, (mid - 1 - i) / 100, order_id=2 * i + 1))
+        engine.add_order(Order("S", 'sell', 1, (mid + 1 + i) / 100, order_id=2 * i + 2))
+
+    def run():
+        for _ in range(calls):
+            engine.get_snapshot()
+    return best_of(repeat, run) / calls * 1e6
+
+def bench_env(resets, steps, repeat, seed):
+    # Each run gets a fresh env (cold: empty warm cache; warm: the seeds
+    # already cached; step: reset once), built outside the timer.
+    seeds = [seed + k for k in range(resets)]
+    cached = seeds[-GymTradingEnvironment().warm_cache_size:]
+
+    def warmed():
+        env = GymTradingEnvironment()
+        for s in cached:
+            env.reset(seed=s)
+        return env
+
+    def stepping():
+        env = GymTradingEnvironment()
+        env.reset(seed=seed)
+        return env
+
+    def reset_cold(env):
+        for s in seeds:
+            env.reset(seed=s)
+
+    def reset_warm(env):
+        for k in range(resets):
+            env.reset(seed=cached[k % len(cached)])
+
+    actions = np.random.default_rng(seed).integers(0, 3, steps).tolist()
+
+    def step(env):
+        for action in actions:
+            _, _, terminated, truncated, _ = env.step(action)
+            if terminated or truncated:
+                env.reset()
+
+    cold = resets / best_of(repeat, reset_cold, GymTradingEnvironment)
+    warm = resets / best_of(repeat, reset_warm, warmed)
+    return cold, warm, steps / best_of(repeat, step, stepping)
+
+def bench_scenarios(repeat, seed):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        with PdfPages(os.path.join(tmp, 'report.pdf')) as pdf:
+            for label, (name, n, mm, mom) in zip('ABC', SCENARIOS):
+                results[f'scenario.{label}'] = best_of(repeat, lambda: run_scenario(pdf, name, n, mm, mom,
+                                                                                    seed=seed))
+    return results
+
+def run_suite(args):
+    seed = args.seed
+    scale = 0.1 if args.quick else 1.0
+    n = int(50000 * scale)
+    metrics = {}
+    if 'engine' in args.groups:
+        metrics['engine.limit_heavy'] = bench_limit_heavy(n, args.repeat, seed)
+        metrics['engine.market_heavy'] = bench_market_heavy(n, args.repeat, seed)
+        metrics['engine.cancel_heavy'] = bench_cancel_heavy(n, args.repeat, seed)
+        for levels in (10, 1000, 100000):
+            metrics[f'engine.snapshot_us.depth_{levels}'] = bench_snapshot(levels, 100000, args.repeat)
+    if 'loop' in args.groups:
+        events = int(200000 * scale)
+        metrics['loop.heap'] = max(run_hold(EventLoop(), 1000, events, 0.1, seed) for _ in range(args.repeat))
+        metrics['loop.calendar'] = max(run_hold(CalendarEventLoop(0.1), 1000, events, 0.1, seed)
+                                       for _ in range(args.repeat))
+    if 'env' in args.groups:
+        cold, warm, step = bench_env(int(20 * scale) or 2, int(20000 * scale), args.repeat, seed)
+        metrics['env.reset_cold'] = cold
+        metrics['env.reset_warm'] = warm
+        metrics['env.step'] = step
+    if 'scenario' in args.groups:
+        metrics.update(bench_scenarios(args.repeat, seed))
+    return metrics
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def find_baseline(records, commit):
+    for record in reversed(records):
+        if commit is None or record['commit'] == commit:
+            return record
+    return None
+
+def budget_for(name, budget, budgets):
+    if name in budgets:
+        return budgets[name]
+    return budget if budget is not None else GROUP_BUDGETS[name.split('.')[0]]
+
+def regressions(metrics, baseline, budget, budgets):
+    # (name, change) for every metric worse than its budget allows; change is
+    # the relative slowdown (positive = worse).
+    failed = []
+    for name, value in metrics.items():
+        old = baseline['metrics'].get(name)
+        if old is None or not old:
+            continue
+        higher_is_better = METRICS[name][1]
+        change = (old - value) / old if higher_is_better else (value - old) / old
+        if change > budget_for(name, budget, budgets):
+            failed.append((name, change))
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite with regression budgets")
+    parser.add_argument('--groups', nargs='+', default=['engine', 'loop', 'env', 'scenario'],
+                        choices=['engine', 'loop', 'env', 'scenario'])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--quick', action='store_true', help="run smaller workloads (not comparable to full runs)")
+    parser.add_argument('--results', default=os.path.join(BENCH_DIR, 'results.jsonl'))
+    parser.add_argument('--baseline', default=None, help="commit to compare against (default: latest record)")
+    parser.add_argument('--budget', type=float, default=None,
+                        help="allowed relative regression per metric (default: per group, GROUP_BUDGETS)")
+    parser.add_argument('--budget-file', default=None, help="JSON object of per-metric budgets")
+    parser.add_argument('--no-record', action='store_true', help="compare only; do not append to the results")
+    args = parser.parse_args()
+
+    budgets = {}
+    if args.budget_file is not None:
+        with open(args.budget_file) as f:
+            budgets = json.load(f)
+
+    records = [r for r in load_results(args.results) if r.get('quick', False) == args.quick]
+    baseline = find_baseline(records, args.baseline)
+    metrics = run_suite(args)
+
+    print(f"{'metric':<34} {'value':>14} {'unit':<9} {'baseline':>14} {'change':>8}")
+    for name, value in metrics.items():
+        unit = METRICS[name][0]
+        old = baseline['metrics'].get(name) if baseline else None
+        change = f"{(value - old) / old:+.1%}" if old else ''
+        old_text = f"{old:,.2f}" if old is not None else '-'
+        print(f"{name:<34} {value:>14,.2f} {unit:<9} {old_text:>14} {change:>8}")
+
+    if not args.no_record:
+        record = {'commit': git_commit(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                  'quick': args.quick, 'metrics': metrics}
+        with open(args.results, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+    if baseline is None:
+        print("No baseline recorded yet.")
+        return
+    failed = regressions(metrics, baseline, args.budget, budgets)
+    for name, change in failed:
+        print(f"REGRESSION {name}: {change:.1%} worse than {baseline['commit']} "
+              f"(budget {budget_for(name, args.budget, budgets):.0%})")
+    if failed:
+        sys.exit(1)
+    print(f"All metrics within budget of {baseline['commit']}.")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,32 @@
 from .order import Order, Trade
 from .matching_engine import MatchingEngine
-from .event_loop import EventLoop
+from .event_loop import EventLoop, CalendarEventLoop, Timer
+from .lifecycle import OrderLifecycle
+from .trade_tape import TradeTape
+from .ledger import Account, Ledger
+from .ticks import TickGrid
+from .order_pool import OrderPool
+from .random_stream import RandomStream
+from .arrivals import PoissonArrivals
+from .flow_log import OrderFlowLog, replay_log
+from .instrumentation import Instrumentation
 
 __all__ = [
     "Order",
     "Trade",
     "MatchingEngine",
-    "EventLoop"
+    "EventLoop",
+    "CalendarEventLoop",
+    "Timer",
+    "OrderLifecycle",
+    "TradeTape",
+    "Account",
+    "Ledger",
+    "TickGrid",
+    "OrderPool",
+    "RandomStream",
+    "PoissonArrivals",
+    "OrderFlowLog",
+    "replay_log",
+    "Instrumentation"
     ]
\ No newline at end of file
@@ -0,0 +1,55 @@
+import numpy as np
+from .random_stream import RandomStream
+
+class PoissonArrivals:
+    # Pre-generated Poisson arrival schedule for an EventLoop stream (see
+    # EventLoop.add_stream). Arrival times and the index of the agent picked
+    # for each arrival are drawn in vectorized blocks of `block_size`;
+    # next_time is the next arrival and pop() returns its pick.
+    # With rate_fn (vectorized t -> intensity, e.g. an intraday curve) the
+    # times are thinned from a homogeneous process at `rate`, which must
+    # bound rate_fn over the session.
+    def __init__(self, rate, n_agents, rng=None, rate_fn=None, start=0.0, end=float('inf'), block_size=4096):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if n_agents <= 0:
+            raise ValueError(f"n_agents must be positive, got {n_agents}")
+        self.rate = rate
+        self.n_agents = n_agents
+        self.rng = rng if isinstance(rng, RandomStream) else RandomStream(rng)
+        self.rate_fn = rate_fn
+        self.end = end
+        self.block_size = block_size
+        self.last_time = start
+        self.times = []
+        self.picks = []
+        self.next_time = start
+        self._refill()
+
+    def _refill(self):
+        generator = self.rng.generator
+        times = np.empty(0)
+        while not len(times) and self.last_time < self.end:
+            gaps = generator.standard_exponential(self.block_size) / self.rate
+            candidates = self.last_time + np.cumsum(gaps)
+            self.last_time = candidates[-1]
+            if self.rate_fn is not None:
+                accept = np.asarray(self.rate_fn(candidates), dtype=np.float64) / self.rate
+                if accept.max() > 1.0:
+                    raise ValueError(f"rate_fn exceeds the bounding rate {self.rate}")
+                candidates = candidates[generator.random(self.block_size) < accept]
+            times = candidates[candidates <= self.end]
+        picks = generator.integers(0, self.n_agents, len(times))
+        # Stored reversed so the next arrival is a list pop.
+        self.times = times[::-1].tolist()
+        self.picks = picks[::-1].tolist()
+        self.next_time = self.times[-1] if self.times else float('inf')
+
+    def pop(self):
+        self.times.pop()
+        pick = self.picks.pop()
+        if self.times:
+            self.next_time = self.times[-1]
+        else:
+            self._refill()
+        return pick
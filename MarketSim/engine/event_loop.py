@@ -1,37 +1,239 @@
 import heapq
+from time import perf_counter
+
+INF = float('inf')
+
+class Timer:
+    # Handle for a periodic or recurring event. A periodic timer runs every
+    # `interval`; a recurring one (interval None) runs again after whatever
+    # delay its callback returns, or stops when it returns None. The same
+    # Timer is re-queued each time, so repeats allocate no closures.
+    __slots__ = ('loop', 'interval', 'callback', 'args', 'priority', 'next_time', 'active')
+
+    def __init__(self, loop, interval, callback, args, priority, next_time):
+        self.loop = loop
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.priority = priority
+        self.next_time = next_time
+        self.active = True
+
+    def cancel(self):
+        self.active = False
+
+    def __call__(self):
+        if not self.active:
+            return
+        delay = self.callback(*self.args)
+        if self.interval is not None:
+            delay = self.interval
+        if delay is None or not self.active:
+            self.active = False
+            return
+        self.next_time += delay
+        self.loop._push(self.next_time, self.priority, self, ())
 
 class EventLoop:
     def __init__(self):
         self.current_time = 0.0
         self.event_queue = []
         self.sequence_counter = 0
+        self.streams = []
+        # An Instrumentation, set by its attach(); runs then go through
+        # _run_instrumented and the plain loops are untouched.
+        self.stats = None
+
+    def __len__(self):
+        return len(self.event_queue)
+
+    def add_stream(self, stream, callback):
+        # Merges a pre-sorted event source into the loop without going through
+        # the queue: `stream.next_time` is its next event time (inf when
+        # exhausted) and `callback(stream.pop())` runs that event. At equal
+        # times queued events run first.
+        self.streams.append((stream, callback))
+
+    def _next_stream(self):
+        best = None
+        for entry in self.streams:
+            if best is None or entry[0].next_time < best[0].next_time:
+                best = entry
+        return best
+
+    def schedule(self, delay, callback,priority=1, args=()):
+        # `args` are passed to the callback, so callers need no closure.
+        self._push(self.current_time + delay, priority, callback, args)
+
+    def schedule_periodic(self, interval, callback, args=(), delay=None, priority=1):
+        # First run after `delay` (default: one interval), then every interval.
+        next_time = self.current_time + (interval if delay is None else delay)
+        timer = Timer(self, interval, callback, args, priority, next_time)
+        self._push(next_time, priority, timer, ())
+        return timer
 
-    def schedule(self, delay, callback,priority=1):
-        target_time = self.current_time + delay
+    def schedule_recurring(self, delay, callback, args=(), priority=1):
+        # First run after `delay`; the callback returns the next delay.
+        next_time = self.current_time + delay
+        timer = Timer(self, None, callback, args, priority, next_time)
+        self._push(next_time, priority, timer, ())
+        return timer
+
+    def _push(self, target_time, priority, callback, args):
         self.sequence_counter += 1
-        
-        event = (target_time, priority, self.sequence_counter, callback)
-        
+
+        event = (target_time, priority, self.sequence_counter, callback, args)
+
         heapq.heappush(self.event_queue, event)
-    
+
+    def _pop(self):
+        return heapq.heappop(self.event_queue)
+
+    def _peek_time(self):
+        return self.event_queue[0][0] if self.event_queue else None
+
     def process_next_event(self):
-        if not self.event_queue:
+        next_time = self._peek_time()
+        if self.streams:
+            stream, stream_callback = self._next_stream()
+            stream_time = stream.next_time
+            if stream_time != INF and (next_time is None or stream_time < next_time):
+                self.current_time = stream_time
+                if self.stats is not None:
+                    self._timed(stream_callback, (stream.pop(),))
+                else:
+                    stream_callback(stream.pop())
+                return True
+        if next_time is None:
             return False
-            
-        timestamp, priority, _, callback = heapq.heappop(self.event_queue)
-        
+
+        timestamp, priority, _, callback, args = self._pop()
+
         self.current_time = timestamp
-        
-        callback()
+
+        if self.stats is not None:
+            self._timed(callback, args)
+        else:
+            callback(*args)
         return True
 
+    def _timed(self, callback, args):
+        queue_length = len(self)
+        start = perf_counter()
+        callback(*args)
+        self.stats.event(callback, perf_counter() - start, queue_length)
+
+    def _next_time(self):
+        next_time = self._peek_time()
+        if next_time is None:
+            next_time = INF
+        if self.streams:
+            next_time = min(next_time, self._next_stream()[0].next_time)
+        return next_time
+
+    def _run_instrumented(self, max_time):
+        while self._next_time() <= max_time:
+            self.process_next_event()
+        self.current_time = max_time
+
     def run_until(self, max_time):
-        
-        while self.event_queue:
-            next_time = self.event_queue[0][0]
-            
-            if next_time > max_time:
+        if self.stats is not None:
+            self._run_instrumented(max_time)
+            return
+        if self.streams:
+            self._run_merged(max_time)
+            return
+        queue = self.event_queue
+        heappop = heapq.heappop
+
+        while queue and queue[0][0] <= max_time:
+            timestamp, priority, _, callback, args = heappop(queue)
+            self.current_time = timestamp
+            callback(*args)
+        self.current_time = max_time
+
+    def _run_merged(self, max_time):
+        while True:
+            next_time = self._peek_time()
+            if next_time is None:
+                next_time = INF
+            if self.streams:
+                stream, stream_callback = self._next_stream()
+                stream_time = stream.next_time
+                if stream_time < next_time:
+                    if stream_time > max_time:
+                        break
+                    self.current_time = stream_time
+                    stream_callback(stream.pop())
+                    continue
+            if next_time == INF or next_time > max_time:
                 break
-                
-            self.process_next_event()
-        self.current_time = max_time
\ No newline at end of file
+            timestamp, priority, _, callback, args = self._pop()
+            self.current_time = timestamp
+            callback(*args)
+        self.current_time = max_time
+
+class CalendarEventLoop(EventLoop):
+    # Timer-wheel style queue for many near-future events. Events are hashed
+    # into buckets of `bucket_width` seconds: only the current bucket is a
+    # heap (event_queue); later buckets are unsorted lists that are heapified
+    # when reached, and the ids of non-empty future buckets sit in a small heap.
+    # Event order is identical to EventLoop.
+    def __init__(self, bucket_width=1.0):
+        super().__init__()
+        self.bucket_width = bucket_width
+        self.scale = 1.0 / bucket_width
+        self.current_bucket = 0
+        self.buckets = {}
+        self.bucket_ids = []
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _push(self, target_time, priority, callback, args):
+        self.sequence_counter += 1
+        event = (target_time, priority, self.sequence_counter, callback, args)
+        self.size += 1
+
+        b = int(target_time * self.scale)
+        if b <= self.current_bucket:
+            heapq.heappush(self.event_queue, event)
+            return
+        bucket = self.buckets.get(b)
+        if bucket is None:
+            self.buckets[b] = [event]
+            heapq.heappush(self.bucket_ids, b)
+        else:
+            bucket.append(event)
+
+    def _next_bucket(self):
+        b = heapq.heappop(self.bucket_ids)
+        queue = self.buckets.pop(b)
+        heapq.heapify(queue)
+        self.event_queue = queue
+        self.current_bucket = b
+
+    def _pop(self):
+        if not self.event_queue:
+            self._next_bucket()
+        self.size -= 1
+        return heapq.heappop(self.event_queue)
+
+    def _peek_time(self):
+        if not self.event_queue:
+            if not self.bucket_ids:
+                return None
+            self._next_bucket()
+        return self.event_queue[0][0]
+
+    def run_until(self, max_time):
+        if self.stats is not None:
+            self._run_instrumented(max_time)
+            return
+        self._run_merged(max_time)
+
+EVENT_LOOPS = {
+    'heap': EventLoop,
+    'calendar': CalendarEventLoop
+}
@@ -0,0 +1,167 @@
+import json
+import numpy as np
+from .trade_tape import TradeTape
+from .matching_engine import MatchingEngine
+
+SUBMIT, CANCEL, SNAPSHOT, RECORD = range(4)
+
+class OrderFlowLog:
+    # Binary record of everything that reaches a MatchingEngine built with
+    # flow_log=log: every placed order (after validation, with the price the
+    # book sees), every cancel, and every get_snapshot() call, since snapshots
+    # carry state (last mid / spread). A SnapshotRecorder marks its own
+    # snapshot rows as RECORD with the recording timestamp and depth. Cancels
+    # carry the time passed to the engine (NaN if none was given); plain
+    # snapshot rows have no timestamp (NaN).
+    # Rows live in chunked NumPy columns like a TradeTape; agent ids are
+    # interned, integer order ids are stored as-is and any other ids are
+    # interned as negative codes. replay_log() feeds a log back into an engine.
+    COLUMNS = {
+        'kind': np.int8,
+        'timestamp': np.float64,
+        'order_id': np.int64,
+        'agent': np.int32,
+        'side': np.int8,
+        'order_type': np.int8,
+        'price': np.float64,
+        'qty': np.int64,
+    }
+
+    def __init__(self, chunk_size=4096):
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.capacity = chunk_size
+        self.columns = {name: np.empty(chunk_size, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self.agent_ids = []
+        self.agent_codes = {}
+        self.order_keys = []
+        self.order_codes = {}
+        self.book_type = 'ladder'
+        self.tick_size = None
+
+    def __len__(self):
+        return self.size
+
+    def bind(self, engine):
+        # Called by MatchingEngine so the log knows how to rebuild it.
+        self.book_type = engine.book_type
+        self.tick_size = engine.grid.tick_size if engine.grid is not None else None
+
+    def _grow(self):
+        self.capacity += max(self.chunk_size, self.capacity)
+        for name, column in self.columns.items():
+            grown = np.empty(self.capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def _order_code(self, order_id):
+        if type(order_id) is int:
+            return order_id
+        code = self.order_codes.get(order_id)
+        if code is None:
+            code = self.order_codes[order_id] = -1 - len(self.order_keys)
+            self.order_keys.append(order_id)
+        return code
+
+    def _row(self, kind, timestamp, order_id=0, agent=-1, side=-1, order_type=-1, price=np.nan, qty=0):
+        if self.size == self.capacity:
+            self._grow()
+        i = self.size
+        c = self.columns
+        c['kind'][i] = kind
+        c['timestamp'][i] = timestamp
+        c['order_id'][i] = order_id
+        c['agent'][i] = agent
+        c['side'][i] = side
+        c['order_type'][i] = order_type
+        c['price'][i] = price
+        c['qty'][i] = qty
+        self.size = i + 1
+
+    def submit(self, order_id, agent_id, side_code, type_code, price, qty, timestamp):
+        agent = self.agent_codes.get(agent_id)
+        if agent is None:
+            agent = self.agent_codes[agent_id] = len(self.agent_ids)
+            self.agent_ids.append(agent_id)
+        self._row(SUBMIT, timestamp, self._order_code(order_id), agent, side_code, type_code,
+                  np.nan if price is None else price, qty)
+
+    def cancel(self, order_id, timestamp=None):
+        self._row(CANCEL, np.nan if timestamp is None else timestamp, self._order_code(order_id))
+
+    def snapshot(self):
+        self._row(SNAPSHOT, np.nan)
+
+    def mark_recorded(self, timestamp, depth):
+        # Turns the snapshot row just logged into a recorder snapshot.
+        i = self.size - 1
+        self.columns['kind'][i] = RECORD
+        self.columns['timestamp'][i] = timestamp
+        self.columns['qty'][i] = depth
+
+    def counts(self):
+        kinds = np.bincount(self.columns['kind'][:self.size], minlength=4)
+        return dict(zip(('submit', 'cancel', 'snapshot', 'record'), kinds.tolist()))
+
+    def save(self, path):
+        # One .npz: a packed structured array of rows plus the id tables.
+        records = np.empty(self.size, dtype=list(self.COLUMNS.items()))
+        for name, column in self.columns.items():
+            records[name] = column[:self.size]
+        meta = {'book_type': self.book_type, 'tick_size': self.tick_size}
+        with open(path, 'wb') as f:
+            np.savez(f, records=records,
+                     agent_ids=np.array(self.agent_ids, dtype=str),
+                     order_keys=np.array(self.order_keys, dtype=str),
+                     meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            records = data['records']
+            meta = json.loads(str(data['meta']))
+            log = cls(chunk_size=max(len(records), 1))
+            log.agent_ids = data['agent_ids'].tolist()
+            log.order_keys = data['order_keys'].tolist()
+        for name in cls.COLUMNS:
+            log.columns[name][:len(records)] = records[name]
+        log.size = len(records)
+        log.agent_codes = {agent_id: i for i, agent_id in enumerate(log.agent_ids)}
+        log.order_codes = {key: -1 - i for i, key in enumerate(log.order_keys)}
+        log.book_type = meta['book_type']
+        log.tick_size = meta['tick_size']
+        return log
+
+def replay_log(log, engine=None, recorder=None):
+    # Applies a log to `engine` (default: a fresh engine with the logged book
+    # type and tick size) with no agents, event loop or RNG. RECORD rows go to
+    # `recorder.record_snapshot` when a recorder is given. The resulting tape
+    # and recorder match the logged run exactly. Returns the engine.
+    if engine is None:
+        engine = MatchingEngine(book_type=log.book_type, tape=TradeTape(), tick_size=log.tick_size)
+    n = log.size
+    c = {name: column[:n].tolist() for name, column in log.columns.items()}
+    agent_ids = log.agent_ids
+    order_keys = log.order_keys
+    order_ids = c['order_id']
+    if order_keys:
+        order_ids = [oid if oid >= 0 else order_keys[-1 - oid] for oid in order_ids]
+    if log.tick_size is not None:
+        prices = [None if p != p else int(p) for p in c['price']]
+    else:
+        prices = [None if p != p else p for p in c['price']]
+
+    place = engine._place
+    cancel_order = engine.cancel_order
+    get_snapshot = engine.get_snapshot
+    for kind, timestamp, order_id, agent, side, order_type, price, qty in zip(
+            c['kind'], c['timestamp'], order_ids, c['agent'], c['side'], c['order_type'], prices, c['qty']):
+        if kind == SUBMIT:
+            place(agent_ids[agent], side, qty, price, order_type, timestamp, order_id)
+        elif kind == CANCEL:
+            cancel_order(order_id, timestamp)
+        elif kind == RECORD and recorder is not None:
+            recorder.record_snapshot(engine, timestamp)
+        else:
+            get_snapshot()
+    return engine
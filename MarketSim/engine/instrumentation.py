@@ -0,0 +1,111 @@
+from collections import Counter
+import pandas as pd
+
+class Instrumentation:
+    # Opt-in counters for an EventLoop and a MatchingEngine. attach() sets
+    # their `stats` attribute; every hook is behind an `is not None` check, so
+    # leaving it unattached costs one attribute test per hooked call.
+    # Collected: event count and wall time per callback, queue-length
+    # high-water mark, fills per match call, dead heap entries popped while
+    # cleaning the top of a HeapBook, order / cancel / fill counts and
+    # (with depth_interval) book depth sampled over simulated time.
+    DEPTH_FIELDS = ('time', 'bid_levels', 'ask_levels', 'bid_qty', 'ask_qty', 'resting_orders')
+
+    def __init__(self):
+        self.events = {}
+        self.queue_high_water = 0
+        self.orders = 0
+        self.cancels = 0
+        self.cancelled = 0
+        self.fills = 0
+        self.matches = Counter()
+        self.dead_pops = 0
+        self.depth = {name: [] for name in self.DEPTH_FIELDS}
+
+    def attach(self, engine=None, loop=None, depth_interval=None):
+        if engine is not None:
+            engine.stats = self
+            engine.bids.stats = self
+            engine.asks.stats = self
+        if loop is not None:
+            loop.stats = self
+            if engine is not None and depth_interval is not None:
+                loop.schedule_periodic(depth_interval, self.sample_depth, args=(loop, engine), delay=0.0,
+                                       priority=2)
+        return self
+
+    @staticmethod
+    def detach(engine=None, loop=None):
+        if engine is not None:
+            engine.stats = engine.bids.stats = engine.asks.stats = None
+        if loop is not None:
+            loop.stats = None
+
+    def event(self, callback, seconds, queue_length):
+        # Timers are reported under the callback they run.
+        callback = getattr(callback, 'callback', callback)
+        name = getattr(callback, '__qualname__', None) or type(callback).__name__
+        entry = self.events.get(name)
+        if entry is None:
+            entry = self.events[name] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        if queue_length > self.queue_high_water:
+            self.queue_high_water = queue_length
+
+    def match(self, fills):
+        self.matches[fills] += 1
+        self.fills += fills
+
+    def sample_depth(self, loop, engine):
+        depth = self.depth
+        depth['time'].append(loop.current_time)
+        depth['bid_levels'].append(len(engine.bids.depth.keys))
+        depth['ask_levels'].append(len(engine.asks.depth.keys))
+        depth['bid_qty'].append(sum(engine.bids.depth.qty.values()))
+        depth['ask_qty'].append(sum(engine.asks.depth.qty.values()))
+        depth['resting_orders'].append(len(engine.orders))
+
+    def counters(self):
+        match_calls = sum(self.matches.values())
+        return {
+            'events': sum(count for count, _ in self.events.values()),
+            'event_seconds': sum(seconds for _, seconds in self.events.values()),
+            'queue_high_water': self.queue_high_water,
+            'orders': self.orders,
+            'cancels': self.cancels,
+            'cancelled': self.cancelled,
+            'fills': self.fills,
+            'match_calls': match_calls,
+            'max_fills_per_match': max(self.matches, default=0),
+            'mean_fills_per_match': self.fills / match_calls if match_calls else 0.0,
+            'dead_pops': self.dead_pops,
+        }
+
+    def to_dict(self):
+        return {
+            'counters': self.counters(),
+            'events': {name: {'count': count, 'seconds': seconds}
+                       for name, (count, seconds) in self.events.items()},
+            'fills_per_match': dict(sorted(self.matches.items())),
+            'depth': {name: list(values) for name, values in self.depth.items()},
+        }
+
+    def to_dataframes(self):
+        events = pd.DataFrame(
+            [(name, count, seconds) for name, (count, seconds) in self.events.items()],
+            columns=['callback', 'count', 'seconds']
+        ).set_index('callback')
+        events['us_per_event'] = events['seconds'] / events['count'] * 1e6
+        matches = pd.Series(dict(sorted(self.matches.items())), name='match_calls', dtype='int64')
+        matches.index.name = 'fills'
+        depth = pd.DataFrame(self.depth)
+        if not depth.empty:
+            depth.index = pd.to_datetime(depth['time'], unit='s')
+            depth.index.name = 'datetime'
+        return {
+            'counters': pd.Series(self.counters()),
+            'events': events.sort_values('seconds', ascending=False),
+            'fills_per_match': matches,
+            'depth': depth,
+        }
@@ -0,0 +1,33 @@
+class Account:
+    __slots__ = ('agent_id', 'inventory', 'balance')
+
+    def __init__(self, agent_id, inventory=0, balance=0.0):
+        self.agent_id = agent_id
+        self.inventory = inventory
+        self.balance = balance
+
+
+class Ledger:
+    # Position/cash book keyed by agent id. Subscribe `on_fill` to a
+    # MatchingEngine and each fill updates exactly its buyer and seller.
+    # Anything with `agent_id`, `inventory` and `balance` (agents included)
+    # can be registered as an account.
+    def __init__(self):
+        self.accounts = {}
+
+    def register(self, account):
+        self.accounts[account.agent_id] = account
+        return account
+
+    def open_account(self, agent_id, inventory=0, balance=0.0):
+        return self.register(Account(agent_id, inventory, balance))
+
+    def on_fill(self, timestamp, price, qty, buyer_id, seller_id, aggressor_side):
+        buyer = self.accounts.get(buyer_id)
+        if buyer is not None:
+            buyer.inventory += qty
+            buyer.balance -= qty * price
+        seller = self.accounts.get(seller_id)
+        if seller is not None:
+            seller.inventory -= qty
+            seller.balance += qty * price
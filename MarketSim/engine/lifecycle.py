@@ -0,0 +1,46 @@
+from collections import deque
+from .order_pool import STATUS_NAMES
+
+
+class OrderLifecycle:
+    # Drops terminal (filled/cancelled) orders from the engine's order index,
+    # keeping only the most recent `archive_size` of them as OrderPool records,
+    # and compacts lazy deletion books once dead entries exceed
+    # `compact_threshold` of the book.
+    def __init__(self, archive_size=1000, compact_threshold=0.5, min_compact_size=256):
+        self.archive = deque(maxlen=archive_size)
+        self.compact_threshold = compact_threshold
+        self.min_compact_size = min_compact_size
+        self.retired = {'filled': 0, 'cancelled': 0}
+        self.compactions = 0
+
+    def retire(self, orders, pool, h):
+        order_id = pool.order_id[h]
+        if orders.get(order_id) == h:
+            del orders[order_id]
+        if self.archive.maxlen != 0:
+            self.archive.append(pool.record(h))
+        self.retired[STATUS_NAMES[pool.status[h]]] += 1
+
+    def maybe_compact(self, book):
+        dead = getattr(book, 'dead', 0)
+        if dead >= self.min_compact_size and dead > self.compact_threshold * len(book):
+            book.compact()
+            self.compactions += 1
+
+    def stats(self, engine):
+        bid_entries, ask_entries = len(engine.bids), len(engine.asks)
+        bid_dead = getattr(engine.bids, 'dead', 0)
+        ask_dead = getattr(engine.asks, 'dead', 0)
+        return {
+            'live_orders': len(engine.orders),
+            'book_entries': bid_entries + ask_entries,
+            'dead_book_entries': bid_dead + ask_dead,
+            'live_book_entries': bid_entries + ask_entries - bid_dead - ask_dead,
+            'archived_orders': len(self.archive),
+            'retired_filled': self.retired['filled'],
+            'retired_cancelled': self.retired['cancelled'],
+            'compactions': self.compactions,
+            'pool_capacity': engine.pool.capacity,
+            'pool_in_use': len(engine.pool),
+        }
@@ -1,102 +1,355 @@
-import heapq
-from .order import Order, Trade
+from .order_pool import (
+    OrderPool, OPEN, PARTIAL, FILLED, CANCELLED, STATUS_NAMES,
+    BUY, SELL, SIDE_NAMES, SIDE_CODES, LIMIT, MARKET, ORDER_TYPE_CODES
+)
+from .order_book import BOOK_TYPES
+from .lifecycle import OrderLifecycle
+from .trade_tape import TradeTape
+from .ticks import TickGrid
+
+INTENT_TYPES = {'PLACE_LIMIT': LIMIT, 'PLACE_MARKET': MARKET}
 
 class MatchingEngine:
-    def __init__(self):
-        self.bids = [] 
-        self.asks = [] 
-        self.tape = [] 
+    # With a tick_size, order prices are integer ticks and the engine converts
+    # back to floats only for the tape, fill callbacks, snapshots and depth.
+    # submit, submit_batch and submit_orders take prices in ticks; the Order
+    # API (add_order, get_order) stays in float prices and converts at the
+    # boundary.
+    # Orders live in an OrderPool and are handled by integer handle; `orders`
+    # maps the ids of resting orders to their handles, and Order objects are
+    # only built on request (get_order). Fill callbacks subscribed with an
+    # agent_id only see that agent's fills (once, even for a self-trade).
+    # With a flow_log (OrderFlowLog) every order, cancel and snapshot that
+    # reaches the engine is logged for replay. `stats` is an Instrumentation
+    # (see Instrumentation.attach) or None.
+    def __init__(self, book_type='ladder', lifecycle=None, tape=None, tick_size=None, flow_log=None):
+        if book_type not in BOOK_TYPES:
+            raise ValueError(f"Unknown book_type {book_type!r}, expected one of {sorted(BOOK_TYPES)}")
+        self.book_type = book_type
+        self.pool = OrderPool()
+        self.bids = BOOK_TYPES[book_type]('buy', self.pool)
+        self.asks = BOOK_TYPES[book_type]('sell', self.pool)
+        self.tape = tape if tape is not None else TradeTape()
+        self.fill_subscribers = []
+        self.agent_subscribers = {}
         self.orders = {}
         self.last_mid = 100.0
         self.last_spread = 0.05
+        self.lifecycle = lifecycle if lifecycle is not None else OrderLifecycle()
+        self.grid = TickGrid(tick_size) if tick_size else None
+        self.order_id_counter = 0
+        self.flow_log = flow_log
+        if flow_log is not None:
+            flow_log.bind(self)
+        self.stats = None
+        # Fills of the submit_batch in progress, when the tape may not keep them.
+        self.batch_fills = None
+
+    def next_order_id(self):
+        self.order_id_counter += 1
+        return self.order_id_counter
+
+    def quantize(self, price):
+        if self.grid is not None:
+            return self.grid.to_ticks(price)
+        return max(0.01, round(price, 2))
+
+    def to_price(self, price):
+        if self.grid is not None and price is not None:
+            return self.grid.to_price(price)
+        return price
 
     def add_order(self, order):
-        order.status = 'open'
-        self.orders[order.order_id] = order
-        if order.qty <= 0:
-            return
+        price = order.price
+        if self.grid is not None and price is not None:
+            price = self.grid.to_ticks(price)
+        h = self._submit(order.agent_id, order.side, order.qty, price,
+                         order.order_type, order.timestamp, order.order_id)
+        order.qty = self.pool.qty[h]
+        order.status = STATUS_NAMES[self.pool.status[h]]
 
-        if order.side == 'buy':
-            self.match(order, self.asks)
+    def submit(self, agent_id, side, qty, price=None, order_type='limit', timestamp=0.0, order_id=None):
+        if order_id is None:
+            order_id = self.next_order_id()
+        h = self._submit(agent_id, side, qty, price, order_type, timestamp, order_id)
+        return order_id, STATUS_NAMES[self.pool.status[h]], self.pool.qty[h]
+
+    def get_order(self, order_id):
+        h = self.orders.get(order_id)
+        if h is None:
+            return None
+        order = self.pool.to_order(h)
+        order.price = self.to_price(order.price)
+        return order
+
+    def _submit(self, agent_id, side, qty, price, order_type, timestamp, order_id):
+        # Returns the order's handle. If the order did not come to rest, the
+        # handle is already back on the free list; its fields stay readable
+        # until the next allocation.
+        side_code = SIDE_CODES.get(side)
+        type_code = ORDER_TYPE_CODES.get(order_type)
+        if side_code is None:
+            raise ValueError(f"Violation: Invalid side {side}")
+        if type_code is None:
+            raise ValueError(f"Violation: Invalid order type {order_type}")
+        if qty < 0:
+            raise ValueError(f"Violation: Negative Qty {qty} for Order {order_id}")
+        return self._place(agent_id, side_code, qty, price, type_code, timestamp, order_id)
+
+    def _place(self, agent_id, side_code, qty, price, type_code, timestamp, order_id):
+        if self.flow_log is not None:
+            self.flow_log.submit(order_id, agent_id, side_code, type_code, price, qty, timestamp)
+        if self.stats is not None:
+            self.stats.orders += 1
+        pool = self.pool
+        h = pool.allocate(order_id, agent_id, side_code, type_code, price, qty, timestamp)
+        if qty == 0:
+            pool.release(h)
+            return h
+
+        if side_code == BUY:
+            self.match(h, self.asks)
         else:
-            self.match(order, self.bids)
+            self.match(h, self.bids)
 
-        if order.qty > 0:
-            if order.order_type == 'market':
-                order.status = 'cancelled' if order.status == 'open' else 'filled'
-                return 
-            
-            if order.side == 'buy':
-                heapq.heappush(self.bids, (-order.price, order.timestamp, order))
+        if pool.qty[h] > 0:
+            if type_code == MARKET:
+                pool.status[h] = CANCELLED if pool.status[h] == OPEN else FILLED
+                self.lifecycle.retire(self.orders, pool, h)
+                pool.release(h)
+                return h
+
+            self.orders[order_id] = h
+            if side_code == BUY:
+                self.bids.push(h)
             else:
-                heapq.heappush(self.asks, (order.price, order.timestamp, order))
+                self.asks.push(h)
+        else:
+            self.lifecycle.retire(self.orders, pool, h)
+            pool.release(h)
+        return h
 
-    def match(self, incoming_order, book):
-        while incoming_order.qty > 0 and len(book) > 0:
-            best_price, best_timestamp, resting_order = book[0]
-            
-            if resting_order.status in ['filled', 'cancelled']:
-                heapq.heappop(book)
-                continue
+    def match(self, h, book):
+        pool = self.pool
+        qty = pool.qty
+        status = pool.status
+        price = pool.price
+        side = pool.side[h]
+        is_limit = pool.order_type[h] == LIMIT
+        limit_price = price[h]
+        timestamp = pool.timestamp[h]
+        agent_id = pool.agent_id[h]
+        side_name = SIDE_NAMES[side]
+        stats = self.stats
+        if stats is not None:
+            tape_start = len(self.tape)
 
-            if incoming_order.side == 'sell':
-                match_price = -best_price
-            else:
-                match_price = best_price
+        while qty[h] > 0:
+            r = book.best()
+            if r is None:
+                break
 
-            if incoming_order.order_type == 'limit':
-                if incoming_order.side == 'buy' and match_price > incoming_order.price:
+            match_price = price[r]
+
+            if is_limit:
+                if side == BUY and match_price > limit_price:
                     break 
-                if incoming_order.side == 'sell' and match_price < incoming_order.price:
+                if side == SELL and match_price < limit_price:
                     break 
 
-            executed_qty = min(incoming_order.qty, resting_order.qty)
+            executed_qty = min(qty[h], qty[r])
             
-            incoming_order.qty -= executed_qty
-            resting_order.qty -= executed_qty
+            qty[h] -= executed_qty
+            book.consume(r, executed_qty)
 
-            if incoming_order.qty == 0:
-                incoming_order.status = 'filled'
+            if qty[h] == 0:
+                status[h] = FILLED
             else:
-                incoming_order.status = 'partial'
+                status[h] = PARTIAL
             
-            if resting_order.qty == 0:
-                resting_order.status = 'filled'
-                heapq.heappop(book)
+            resting_agent_id = pool.agent_id[r]
+            if qty[r] == 0:
+                status[r] = FILLED
+                self.lifecycle.retire(self.orders, pool, r)
+                pool.release(r)
             else:
-                resting_order.status = 'partial'
+                status[r] = PARTIAL
             
-            buyer_id = incoming_order.agent_id if incoming_order.side == 'buy' else resting_order.agent_id
-            seller_id = incoming_order.agent_id if incoming_order.side == 'sell' else resting_order.agent_id
+            buyer_id = agent_id if side == BUY else resting_agent_id
+            seller_id = agent_id if side == SELL else resting_agent_id
+            trade_price = match_price if self.grid is None else self.grid.to_price(match_price)
             
-            new_trade = Trade(
-                timestamp=incoming_order.timestamp,
-                price=match_price,
-                qty=executed_qty,
-                buyer_id=buyer_id,
-                seller_id=seller_id,
-                aggressor_side=incoming_order.side
+            self.tape.append(
+                timestamp,
+                trade_price,
+                executed_qty,
+                buyer_id,
+                seller_id,
+                side_name
             )
-            self.tape.append(new_trade)
+            if self.batch_fills is not None:
+                self.batch_fills.append((timestamp, trade_price, executed_qty, buyer_id, seller_id, side_name))
+            for callback in self.fill_subscribers:
+                callback(timestamp, trade_price, executed_qty, buyer_id, seller_id, side_name)
+            if self.agent_subscribers:
+                for callback in self.agent_subscribers.get(buyer_id, ()):
+                    callback(timestamp, trade_price, executed_qty, buyer_id, seller_id, side_name)
+                if seller_id != buyer_id:
+                    for callback in self.agent_subscribers.get(seller_id, ()):
+                        callback(timestamp, trade_price, executed_qty, buyer_id, seller_id, side_name)
+        if stats is not None:
+            stats.match(len(self.tape) - tape_start)
     
-    def cancel_order(self, order_id):
-        if order_id in self.orders:
-            order = self.orders[order_id]
-            if order.status in ['open', 'partial']:
-                order.status = 'cancelled'
-                return True
-        return False
+    def subscribe(self, callback, agent_id=None):
+        if agent_id is None:
+            self.fill_subscribers.append(callback)
+        else:
+            self.agent_subscribers.setdefault(agent_id, []).append(callback)
+
+    def unsubscribe(self, callback, agent_id=None):
+        if agent_id is None:
+            self.fill_subscribers.remove(callback)
+            return
+        callbacks = self.agent_subscribers[agent_id]
+        callbacks.remove(callback)
+        if not callbacks:
+            del self.agent_subscribers[agent_id]
+
+    def cancel_order(self, order_id, timestamp=None):
+        book = self._cancel(order_id, timestamp)
+        if book is None:
+            return False
+        self.lifecycle.maybe_compact(book)
+        return True
+
+    def _cancel(self, order_id, timestamp=None):
+        # Returns the book the order rested in, or None if it was not live.
+        # `timestamp` is only used to stamp the cancel in the flow log.
+        if self.flow_log is not None:
+            self.flow_log.cancel(order_id, timestamp)
+        h = self.orders.get(order_id)
+        if self.stats is not None:
+            self.stats.cancels += 1
+            self.stats.cancelled += h is not None
+        if h is None:
+            return None
+        pool = self.pool
+        pool.status[h] = CANCELLED
+        book = self.bids if pool.side[h] == BUY else self.asks
+        self.lifecycle.retire(self.orders, pool, h)
+        if book.discard(h):
+            pool.release(h)
+        return book
+
+    def submit_batch(self, intents, timestamp=0.0):
+        # Applies agent intents ({'type': 'CANCEL' | 'PLACE_LIMIT' |
+        # 'PLACE_MARKET', ...}) in order. Each intent gets an (order_id,
+        # status, remaining_qty) entry, with status None for a cancel of an
+        # order that is no longer live. Fills are returned as tape column views,
+        # or collected during the batch when the tape may drop rows (bounded,
+        # or flushing to a sink).
+        # Book compaction runs once per batch instead of once per cancel.
+        tape = self.tape
+        tape_start = len(tape)
+        collect = not tape.retains_all
+        if collect:
+            self.batch_fills = []
+        states = []
+        touched = set()
+        try:
+            self._apply_intents(intents, timestamp, states, touched)
+        finally:
+            fills = self.batch_fills
+            self.batch_fills = None
+
+        for side in touched:
+            self.lifecycle.maybe_compact(self.bids if side == 'buy' else self.asks)
+        return {
+            'orders': states,
+            'fills': tape.fill_columns(fills) if collect else tape.since(tape_start)
+        }
+
+    def _apply_intents(self, intents, timestamp, states, touched):
+        pool = self.pool
+        for item in intents:
+            kind = item.get('type', 'PLACE_LIMIT')
+            if kind == 'CANCEL':
+                order_id = item['order_id']
+                book = self._cancel(order_id, timestamp)
+                if book is not None:
+                    touched.add(book.side)
+                states.append((order_id, None if book is None else 'cancelled', 0))
+                continue
+
+            type_code = INTENT_TYPES.get(kind)
+            side_code = SIDE_CODES.get(item['side'])
+            qty = item['qty']
+            if type_code is None:
+                raise ValueError(f"Violation: Invalid intent type {kind}")
+            if side_code is None:
+                raise ValueError(f"Violation: Invalid side {item['side']}")
+            if qty < 0:
+                raise ValueError(f"Violation: Negative Qty {qty} in intent {item}")
+            order_id = item.get('order_id')
+            if order_id is None:
+                order_id = self.next_order_id()
+
+            h = self._place(item['agent_id'], side_code, qty, item.get('price'), type_code, timestamp, order_id)
+            states.append((order_id, STATUS_NAMES[pool.status[h]], pool.qty[h]))
+
+    def submit_orders(self, agent_ids, sides, qtys, prices=None, order_type='limit', timestamp=0.0):
+        # Column form of submission for agent pools: sides are BUY/SELL codes
+        # and prices are engine prices (ticks on a tick grid). Every order gets
+        # an engine-issued id; the ids are returned in input order.
+        type_code = ORDER_TYPE_CODES.get(order_type)
+        if type_code is None:
+            raise ValueError(f"Violation: Invalid order type {order_type}")
+        if prices is None:
+            prices = [None] * len(qtys)
+        order_ids = []
+        for agent_id, side_code, qty, price in zip(agent_ids, sides, qtys, prices):
+            if side_code != BUY and side_code != SELL:
+                raise ValueError(f"Violation: Invalid side code {side_code}")
+            if qty < 0:
+                raise ValueError(f"Violation: Negative Qty {qty} for agent {agent_id}")
+            order_id = self.next_order_id()
+            self._place(agent_id, side_code, qty, price, type_code, timestamp, order_id)
+            order_ids.append(order_id)
+        return order_ids
+
+    def cancel_orders(self, order_ids, timestamp=None):
+        # Returns how many of the orders were live. Books are compacted once.
+        cancelled = 0
+        touched = set()
+        for order_id in order_ids:
+            book = self._cancel(order_id, timestamp)
+            if book is not None:
+                cancelled += 1
+                touched.add(book)
+        for book in touched:
+            self.lifecycle.maybe_compact(book)
+        return cancelled
         
-    def clean_book(self, book):
-        while book and book[0][2].status in ['filled', 'cancelled']:
-            heapq.heappop(book)
-    
-    def get_snapshot(self):
-        self.clean_book(self.bids)
-        self.clean_book(self.asks)
+    def get_depth(self, depth=5):
+        bids = self.bids.levels(depth)
+        asks = self.asks.levels(depth)
+        if self.grid is not None:
+            to_price = self.grid.to_price
+            bids = [(to_price(p), q) for p, q in bids]
+            asks = [(to_price(p), q) for p, q in asks]
+        return {
+            'bids': bids,
+            'asks': asks
+        }
 
-        best_bid = -self.bids[0][0] if self.bids else None
-        best_ask = self.asks[0][0] if self.asks else None
+    def lifecycle_stats(self):
+        return self.lifecycle.stats(self)
+
+    def get_snapshot(self):
+        if self.flow_log is not None:
+            self.flow_log.snapshot()
+        best_bid = self.to_price(self.bids.best_price())
+        best_ask = self.to_price(self.asks.best_price())
         
         if best_bid is not None and best_ask is not None:
             mid = (best_bid + best_ask) / 2
@@ -0,0 +1,175 @@
+import heapq
+from bisect import bisect_left, insort
+from .order_pool import CANCELLED
+
+
+class DepthLevels:
+    # Aggregated live quantity per price level. Keys are kept sorted ascending
+    # and books negate ask prices, so the best level is always keys[-1] and the
+    # top N levels are the last N keys.
+    def __init__(self):
+        self.qty = {}
+        self.keys = []
+
+    def add(self, key, qty):
+        if key in self.qty:
+            self.qty[key] += qty
+        else:
+            self.qty[key] = qty
+            insort(self.keys, key)
+
+    def remove(self, key, qty):
+        remaining = self.qty[key] - qty
+        if remaining > 0:
+            self.qty[key] = remaining
+            return
+        del self.qty[key]
+        keys = self.keys
+        if keys[-1] == key:
+            keys.pop()
+        else:
+            del keys[bisect_left(keys, key)]
+
+    def best_key(self):
+        return self.keys[-1] if self.keys else None
+
+    def top(self, n):
+        qty = self.qty
+        return [(key, qty[key]) for key in self.keys[:-n - 1:-1]]
+
+
+class HeapBook:
+    # Original lazy-deletion book: (key, timestamp, seq, handle) heap where
+    # cancelled orders stay in place until they surface at the top. `dead`
+    # counts the cancelled entries still sitting in the heap; their pool
+    # handles are released only once they are popped. `seq` keeps ties FIFO.
+    def __init__(self, side, pool):
+        self.side = side
+        self.sign = 1 if side == 'buy' else -1
+        self.pool = pool
+        self.heap = []
+        self.seq = 0
+        self.dead = 0
+        self.depth = DepthLevels()
+        self.stats = None
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, h):
+        key = self.sign * self.pool.price[h]
+        self.seq += 1
+        heapq.heappush(self.heap, (-key, self.pool.timestamp[h], self.seq, h))
+        self.depth.add(key, self.pool.qty[h])
+
+    def clean(self):
+        heap = self.heap
+        status = self.pool.status
+        while heap and status[heap[0][3]] == CANCELLED:
+            self.pool.release(heapq.heappop(heap)[3])
+            self.dead -= 1
+            if self.stats is not None:
+                self.stats.dead_pops += 1
+
+    def best(self):
+        self.clean()
+        return self.heap[0][3] if self.heap else None
+
+    def best_price(self):
+        key = self.depth.best_key()
+        if key is None:
+            return None
+        return self.sign * key
+
+    def consume(self, h, qty):
+        self.pool.qty[h] -= qty
+        self.depth.remove(self.sign * self.pool.price[h], qty)
+        if self.pool.qty[h] == 0:
+            heapq.heappop(self.heap)
+
+    def discard(self, h):
+        self.dead += 1
+        self.depth.remove(self.sign * self.pool.price[h], self.pool.qty[h])
+        return False
+
+    def compact(self):
+        live = []
+        status = self.pool.status
+        for entry in self.heap:
+            if status[entry[3]] == CANCELLED:
+                self.pool.release(entry[3])
+            else:
+                live.append(entry)
+        heapq.heapify(live)
+        self.heap = live
+        self.dead = 0
+
+    def levels(self, n):
+        sign = self.sign
+        return [(sign * key, qty) for key, qty in self.depth.top(n)]
+
+
+class LadderBook:
+    # Price ladder: one insertion-ordered dict (FIFO queue of handles) per
+    # price level, indexed by the sorted keys of the aggregated depth.
+    def __init__(self, side, pool):
+        self.side = side
+        self.sign = 1 if side == 'buy' else -1
+        self.pool = pool
+        self.levels_by_key = {}
+        self.depth = DepthLevels()
+        self.stats = None
+
+    def __len__(self):
+        return sum(len(level) for level in self.levels_by_key.values())
+
+    def push(self, h):
+        key = self.sign * self.pool.price[h]
+        level = self.levels_by_key.get(key)
+        if level is None:
+            level = self.levels_by_key[key] = {}
+        level[h] = None
+        self.depth.add(key, self.pool.qty[h])
+
+    def best(self):
+        key = self.depth.best_key()
+        if key is None:
+            return None
+        return next(iter(self.levels_by_key[key]))
+
+    def best_price(self):
+        key = self.depth.best_key()
+        if key is None:
+            return None
+        return self.sign * key
+
+    def consume(self, h, qty):
+        self.pool.qty[h] -= qty
+        key = self.depth.keys[-1]
+        self.depth.remove(key, qty)
+        if self.pool.qty[h] == 0:
+            level = self.levels_by_key[key]
+            del level[h]
+            if not level:
+                del self.levels_by_key[key]
+
+    def discard(self, h):
+        key = self.sign * self.pool.price[h]
+        level = self.levels_by_key.get(key)
+        if level is None or h not in level:
+            return False
+        del level[h]
+        if not level:
+            del self.levels_by_key[key]
+        self.depth.remove(key, self.pool.qty[h])
+        return True
+
+    def levels(self, n):
+        sign = self.sign
+        return [(sign * key, qty) for key, qty in self.depth.top(n)]
+
+
+BOOK_TYPES = {
+    'heap': HeapBook,
+    'ladder': LadderBook,
+}
@@ -0,0 +1,93 @@
+import numpy as np
+from .order import Order
+
+OPEN, PARTIAL, FILLED, CANCELLED = range(4)
+STATUS_NAMES = ('open', 'partial', 'filled', 'cancelled')
+BUY, SELL = 0, 1
+SIDE_NAMES = ('buy', 'sell')
+SIDE_CODES = {'buy': BUY, 'sell': SELL}
+LIMIT, MARKET = 0, 1
+ORDER_TYPE_NAMES = ('limit', 'market')
+ORDER_TYPE_CODES = {'limit': LIMIT, 'market': MARKET}
+
+class OrderPool:
+    # Struct-of-arrays order storage addressed by integer handle. Each field
+    # is a preallocated column grown in chunks; released handles go on a free
+    # list and are recycled by the next allocation. Columns are plain lists
+    # because the engine reads them one element at a time from Python, where
+    # list indexing beats NumPy scalar access; as_arrays() exports NumPy
+    # columns for bulk analysis.
+    FIELDS = ('order_id', 'agent_id', 'side', 'order_type', 'price', 'qty', 'status', 'timestamp')
+
+    def __init__(self, chunk_size=1024):
+        self.chunk_size = chunk_size
+        self.capacity = 0
+        self.order_id = []
+        self.agent_id = []
+        self.side = []
+        self.order_type = []
+        self.price = []
+        self.qty = []
+        self.status = []
+        self.timestamp = []
+        self.free = []
+        self._grow()
+
+    def __len__(self):
+        return self.capacity - len(self.free)
+
+    def _grow(self):
+        n = self.chunk_size
+        for name in self.FIELDS:
+            getattr(self, name).extend([None] * n)
+        self.free.extend(range(self.capacity + n - 1, self.capacity - 1, -1))
+        self.capacity += n
+
+    def allocate(self, order_id, agent_id, side, order_type, price, qty, timestamp):
+        if not self.free:
+            self._grow()
+        h = self.free.pop()
+        self.order_id[h] = order_id
+        self.agent_id[h] = agent_id
+        self.side[h] = side
+        self.order_type[h] = order_type
+        self.price[h] = price
+        self.qty[h] = qty
+        self.status[h] = OPEN
+        self.timestamp[h] = timestamp
+        return h
+
+    def release(self, h):
+        self.free.append(h)
+
+    def record(self, h):
+        return (self.order_id[h], self.agent_id[h], SIDE_NAMES[self.side[h]],
+                ORDER_TYPE_NAMES[self.order_type[h]], self.price[h], self.qty[h],
+                STATUS_NAMES[self.status[h]], self.timestamp[h])
+
+    def to_order(self, h):
+        order = Order(
+            agent_id=self.agent_id[h],
+            side=SIDE_NAMES[self.side[h]],
+            qty=self.qty[h],
+            price=self.price[h],
+            order_type=ORDER_TYPE_NAMES[self.order_type[h]],
+            timestamp=self.timestamp[h],
+            order_id=self.order_id[h]
+        )
+        order.status = STATUS_NAMES[self.status[h]]
+        return order
+
+    def as_arrays(self, handles=None):
+        if handles is None:
+            free = set(self.free)
+            handles = [h for h in range(self.capacity) if h not in free]
+        return {
+            'handle': np.asarray(handles, dtype=np.int64),
+            'side': np.array([self.side[h] for h in handles], dtype=np.int8),
+            'order_type': np.array([self.order_type[h] for h in handles], dtype=np.int8),
+            'price': np.array([np.nan if self.price[h] is None else self.price[h] for h in handles], dtype=np.float64),
+            'qty': np.array([self.qty[h] for h in handles], dtype=np.int64),
+            'status': np.array([self.status[h] for h in handles], dtype=np.int8),
+            'timestamp': np.array([self.timestamp[h] for h in handles], dtype=np.float64),
+        }
@@ -0,0 +1,62 @@
+import numpy as np
+
+class RandomStream:
+    # Per-simulation random source. Variates are drawn from a private
+    # numpy Generator in blocks of `block_size` and handed out one at a time
+    # from Python lists, so a scalar draw is a list pop instead of a Generator
+    # call. `seed` may be an int, a SeedSequence or None (fresh entropy);
+    # spawn() derives independent child streams, e.g. one per agent; give
+    # many-stream populations a small block_size, since every stream buffers
+    # up to block_size Python floats per distribution it draws from.
+    def __init__(self, seed=None, block_size=4096):
+        self.seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.generator = np.random.default_rng(self.seed_seq)
+        self.block_size = block_size
+        self._uniform = []
+        self._normal = []
+        self._exponential = []
+
+    def __getstate__(self):
+        # Buffered variates pickle as float arrays, which is far cheaper than
+        # lists of Python floats (warm-start snapshots copy many streams).
+        state = self.__dict__.copy()
+        for name in ('_uniform', '_normal', '_exponential'):
+            state[name] = np.array(state[name], dtype=np.float64)
+        return state
+
+    def __setstate__(self, state):
+        for name in ('_uniform', '_normal', '_exponential'):
+            state[name] = state[name].tolist()
+        self.__dict__.update(state)
+
+    def spawn(self, n, block_size=None):
+        block_size = self.block_size if block_size is None else block_size
+        return [RandomStream(child, block_size) for child in self.seed_seq.spawn(n)]
+
+    def random(self):
+        if not self._uniform:
+            self._uniform = self.generator.random(self.block_size).tolist()
+        return self._uniform.pop()
+
+    def uniform(self, low=0.0, high=1.0):
+        return low + (high - low) * self.random()
+
+    def randint(self, low, high):
+        # Inclusive of both ends, like random.randint.
+        return low + int(self.random() * (high - low + 1))
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+    def normal(self, loc=0.0, scale=1.0):
+        if not self._normal:
+            self._normal = self.generator.standard_normal(self.block_size).tolist()
+        return loc + scale * self._normal.pop()
+
+    def exponential(self, scale=1.0):
+        if not self._exponential:
+            self._exponential = self.generator.standard_exponential(self.block_size).tolist()
+        return scale * self._exponential.pop()
+
+    def shuffle(self, items):
+        self.generator.shuffle(items)
@@ -0,0 +1,15 @@
+class TickGrid:
+    # Integer-tick price grid. Prices inside the engine are ints; conversion
+    # back to floats divides by the (exact) ticks-per-unit scale so that e.g.
+    # 9981 ticks of 0.01 is exactly 99.81.
+    def __init__(self, tick_size=0.01):
+        if tick_size <= 0:
+            raise ValueError(f"tick_size must be positive, got {tick_size}")
+        self.tick_size = tick_size
+        self.scale = 1.0 / tick_size
+
+    def to_ticks(self, price):
+        return max(1, round(price * self.scale))
+
+    def to_price(self, ticks):
+        return ticks / self.scale
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+from .order import Trade
+
+AGGRESSOR_SIDES = ['buy', 'sell']
+
+class TradeTape:
+    # Columnar trade log. Each field lives in its own NumPy array that grows in
+    # whole chunks; agent ids are interned to int32 codes. Column reads return
+    # views, so consumers can keep a cursor and read "trades since k" for free.
+    # With max_size the tape keeps only (at least) the last max_size trades:
+    # storage stops growing at twice that and the newest max_size rows are
+    # moved to the front when it fills. max_size=0 stores nothing. Indices and
+    # cursors are absolute (len() counts every trade ever appended); `offset`
+    # is the index of the oldest row still held. With a sink (e.g. a
+    # RunWriter) each full chunk is handed to sink.write_trades and dropped
+    # from memory instead.
+    COLUMNS = {
+        'timestamp': np.float64,
+        'price': np.float64,
+        'qty': np.int64,
+        'buyer': np.int32,
+        'seller': np.int32,
+        'aggressor': np.int8,
+    }
+
+    def __init__(self, chunk_size=4096, max_size=None, sink=None):
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.sink = sink
+        self.offset = 0
+        self.size = 0
+        self.capacity = chunk_size if max_size is None else min(chunk_size, 2 * max_size)
+        self.columns = {name: np.empty(chunk_size, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self.agent_ids = []
+        self.agent_codes = {}
+
+    def __len__(self):
+        return self.offset + self.size
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        index -= self.offset
+        if not 0 <= index < self.size:
+            raise IndexError("trade index out of range")
+        c = self.columns
+        return Trade(
+            timestamp=float(c['timestamp'][index]),
+            price=float(c['price'][index]),
+            qty=int(c['qty'][index]),
+            buyer_id=self.agent_ids[c['buyer'][index]],
+            seller_id=self.agent_ids[c['seller'][index]],
+            aggressor_side=AGGRESSOR_SIDES[c['aggressor'][index]]
+        )
+
+    def __iter__(self):
+        return self.iter_trades()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['columns'] = {name: column[:self.size].copy() for name, column in self.columns.items()}
+        state['capacity'] = self.size
+        return state
+
+    def intern(self, agent_id):
+        code = self.agent_codes.get(agent_id)
+        if code is None:
+            code = self.agent_codes[agent_id] = len(self.agent_ids)
+            self.agent_ids.append(agent_id)
+        return code
+
+    def _grow(self):
+        self.capacity += max(self.chunk_size, self.capacity)
+        if self.max_size is not None:
+            self.capacity = min(self.capacity, 2 * self.max_size)
+        for name, column in self.columns.items():
+            grown = np.empty(self.capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def _drop_oldest(self):
+        keep = self.max_size
+        start = self.size - keep
+        for column in self.columns.values():
+            column[:keep] = column[start:self.size]
+        self.offset += start
+        self.size = keep
+
+    def append(self, timestamp, price, qty, buyer_id, seller_id, aggressor_side):
+        if self.size == self.capacity:
+            if self.sink is not None:
+                self.flush()
+            elif self.max_size is None or self.capacity < 2 * self.max_size:
+                self._grow()
+            elif self.max_size == 0:
+                self.offset += 1
+                return
+            else:
+                self._drop_oldest()
+        i = self.size
+        c = self.columns
+        c['timestamp'][i] = timestamp
+        c['price'][i] = price
+        c['qty'][i] = qty
+        c['buyer'][i] = self.intern(buyer_id)
+        c['seller'][i] = self.intern(seller_id)
+        c['aggressor'][i] = 0 if aggressor_side == 'buy' else 1
+        self.size = i + 1
+
+    def flush(self):
+        if self.sink is None or not self.size:
+            return
+        self.sink.write_trades({name: column[:self.size] for name, column in self.columns.items()}, self.agent_ids)
+        self.offset += self.size
+        self.size = 0
+
+    @property
+    def retains_all(self):
+        # Whether since(cursor) is guaranteed to hold every trade appended
+        # after cursor was taken.
+        return self.max_size is None and self.sink is None
+
+    def fill_columns(self, fills):
+        # (timestamp, price, qty, buyer, seller, aggressor) tuples as columns
+        # in the since() layout, agent codes interned in this tape.
+        columns = {name: np.empty(len(fills), dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        for i, (timestamp, price, qty, buyer_id, seller_id, aggressor_side) in enumerate(fills):
+            columns['timestamp'][i] = timestamp
+            columns['price'][i] = price
+            columns['qty'][i] = qty
+            columns['buyer'][i] = self.intern(buyer_id)
+            columns['seller'][i] = self.intern(seller_id)
+            columns['aggressor'][i] = 0 if aggressor_side == 'buy' else 1
+        return columns
+
+    def record_trade(self, trade: Trade):
+        self.append(trade.timestamp, trade.price, trade.qty, trade.buyer_id, trade.seller_id, trade.aggressor_side)
+
+    def clear(self):
+        self.offset = 0
+        self.size = 0
+
+    def since(self, cursor=0):
+        # Trades dropped by a bounded tape are skipped.
+        start = max(cursor - self.offset, 0)
+        return {name: column[start:self.size] for name, column in self.columns.items()}
+
+    def iter_trades(self, cursor=0):
+        for i in range(max(cursor, self.offset), len(self)):
+            yield self[i]
+
+    def to_structured(self):
+        out = np.empty(self.size, dtype=list(self.COLUMNS.items()))
+        for name, column in self.since(self.offset).items():
+            out[name] = column
+        return out
+
+    def to_dataframe(self, cursor=0):
+        cols = self.since(cursor)
+        return pd.DataFrame({
+            'timestamp': cols['timestamp'],
+            'price': cols['price'],
+            'qty': cols['qty'],
+            'buyer_id': pd.Categorical.from_codes(cols['buyer'], categories=list(self.agent_ids)),
+            'seller_id': pd.Categorical.from_codes(cols['seller'], categories=list(self.agent_ids)),
+            'aggressor_side': pd.Categorical.from_codes(cols['aggressor'], categories=AGGRESSOR_SIDES),
+        }, copy=False)
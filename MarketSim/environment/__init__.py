@@ -3,9 +3,11 @@ from engine.order import Order
 from analytics.tape import Tape
 from agents.agents import NoiseTrader, MarketMaker, BaseAgent
 from .market_environment import GymTradingEnvironment
+from .vector_environment import VectorTradingEnvironment
 
 __all__ = [
     "GymTradingEnvironment",
+    "VectorTradingEnvironment",
     "MatchingEngine",
     "Order",
     "Tape",
@@ -1,18 +1,54 @@
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np 
-import random
+import io
+import pickle
+from collections import OrderedDict
 
 from engine.matching_engine import MatchingEngine
-from engine.order import Order
+from engine.trade_tape import TradeTape
 from engine.event_loop import EventLoop
+from engine.ledger import Account, Ledger
+from engine.random_stream import RandomStream
 from agents.agents import MarketMaker, NoiseTrader
 
+class _StatePickler(pickle.Pickler):
+    # References to the environment itself (bound-method callbacks in the
+    # event queue) are stored as a token and resolved to the live env.
+    def __init__(self, file, env):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.env = env
+
+    def persistent_id(self, obj):
+        return 'env' if obj is self.env else None
+
+class _StateUnpickler(pickle.Unpickler):
+    def __init__(self, file, env):
+        super().__init__(file)
+        self.env = env
+
+    def persistent_load(self, pid):
+        return self.env
+
 class GymTradingEnvironment(gym.Env):
     metadata = {'render_modes': ['human']}
 
-    def __init__(self):
+    # Everything the warm-up simulation produces. reset() snapshots it after
+    # the 20s warm-up, keyed by the market seed, and later resets with the
+    # same seed restore the snapshot instead of simulating again.
+    WARM_STATE = ('loop', 'order_book', 'ledger', 'insider', 'agents', 'rng')
+
+    def __init__(self, tick_size=0.01, warm_cache_size=16, warm_pool=0, tape_size=10000):
         super(GymTradingEnvironment, self).__init__()
+        self.tick_size = tick_size
+        # The engine tape keeps the last tape_size trades (None: all, 0: none);
+        # the Insider's position comes from its own fill subscription.
+        self.tape_size = tape_size
+        # warm_pool > 0 makes unseeded resets start from one of that many
+        # market seeds, so they are served from the cache once warm.
+        self.warm_cache_size = warm_cache_size
+        self.warm_pool = warm_pool
+        self.warm_cache = OrderedDict()
         
         self.loop = EventLoop()
         self.action_space = spaces.Discrete(3)
@@ -20,64 +56,89 @@ class GymTradingEnvironment(gym.Env):
         self.observation_space = spaces.Box(low=-10.0, high=10.0, shape=(5,), dtype=np.float32)
 
         self.order_book = None
+        self.rng = None
         self.agents = []
         self.max_steps = 1000  
         
-        self.insider_inventory = 0
-        self.cash_balance = 100000.0
+        self.ledger = Ledger()
+        self.insider = Account("Insider", balance=100000.0)
         self.portfolio_value = 100000.0
-        self.tape_reader_index = 0
         
         self.peak_portfolio_value = 100000.0
         self.max_drawdown = 0.0
         self.risk_aversion = 0.5  
 
+    @property
+    def insider_inventory(self):
+        return self.insider.inventory
+
+    @property
+    def cash_balance(self):
+        return self.insider.balance
+
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
-        if seed is not None:
-            random.seed(seed)
-            np.random.seed(seed)
+        # Market randomness is derived from the Gymnasium np_random, so
+        # reset(seed=...) makes the episode reproducible. Only seeded and
+        # warm_pool resets are cached: a fresh random market seed would almost
+        # never be seen again.
+        cacheable = seed is not None or bool(self.warm_pool)
+        if self.warm_pool and seed is None:
+            market_seed = int(self.np_random.integers(self.warm_pool))
+        else:
+            market_seed = int(self.np_random.integers(2**63))
+
+        snapshot = self.warm_cache.get(market_seed)
+        if snapshot is not None:
+            self.warm_cache.move_to_end(market_seed)
+            self._restore_state(snapshot)
+        else:
+            self._warm_up(market_seed)
+            if self.warm_cache_size and cacheable:
+                self.warm_cache[market_seed] = self._capture_state()
+                if len(self.warm_cache) > self.warm_cache_size:
+                    self.warm_cache.popitem(last=False)
 
-        self.loop = EventLoop()
-        self.order_book = MatchingEngine()
-        
-        self.insider_inventory = 0
-        self.cash_balance = 100000.0
         self.portfolio_value = 100000.0
-        self.tape_reader_index = 0
-        
         self.peak_portfolio_value = 100000.0
         self.max_drawdown = 0.0
         
+        return self._get_obs(), {}
+
+    def _capture_state(self):
+        buffer = io.BytesIO()
+        _StatePickler(buffer, self).dump({name: getattr(self, name) for name in self.WARM_STATE})
+        return buffer.getvalue()
+
+    def _restore_state(self, snapshot):
+        for name, value in _StateUnpickler(io.BytesIO(snapshot), self).load().items():
+            setattr(self, name, value)
+
+    def _warm_up(self, market_seed):
+        # Small blocks keep the per-agent streams (and snapshots) compact.
+        self.rng = RandomStream(market_seed, block_size=256)
+
+        self.loop = EventLoop()
+        self.order_book = MatchingEngine(tick_size=self.tick_size, tape=TradeTape(max_size=self.tape_size))
+        self.ledger = Ledger()
+        self.order_book.subscribe(self.ledger.on_fill, agent_id="Insider")
+        
+        self.insider = self.ledger.open_account("Insider", balance=100000.0)
+        
+        agent_rngs = iter(self.rng.spawn(15))
         self.agents = []
         for i in range(5): 
-            self.agents.append(MarketMaker(f"MM_{i}", inventory_limit=1000))
+            self.agents.append(MarketMaker(f"MM_{i}", inventory_limit=1000, tick_size=self.tick_size,
+                                           order_ids=self.order_book.next_order_id, rng=next(agent_rngs)))
         for i in range(10): 
-            self.agents.append(NoiseTrader(f"NT_{i}", sigma=3.0))
-        random.shuffle(self.agents)
+            self.agents.append(NoiseTrader(f"NT_{i}", sigma=3.0, tick_size=self.tick_size, rng=next(agent_rngs)))
+        self.rng.shuffle(self.agents)
 
-        self.loop.schedule(0.1, self._background_agent_step)
+        self.loop.schedule_recurring(0.1, self._background_agent_step)
         self.loop.run_until(20.0)
 
-        self.tape_reader_index = len(self.order_book.tape)
-        
-        return self._get_obs(), {}
-
     def step(self, action):
-        fixed_qty = 10 
-        snap = self.order_book.get_snapshot()
-        mid_price = snap['mid_price'] if snap['mid_price'] > 0 else 100.0
-        
-        aggressive_offset = 0.05 
-        if action == 1: 
-            price = round(mid_price + aggressive_offset, 2)
-            self._place_order('buy', price, fixed_qty)
-        elif action == 2: 
-            price = round(mid_price - aggressive_offset, 2)
-            self._place_order('sell', price, fixed_qty)
-            
-        self.loop.run_until(self.loop.current_time + 1.0)
-        self._process_fills()
+        mid_price = self._advance(action)
 
         prev_value = self.portfolio_value
         self.portfolio_value = self.cash_balance + (self.insider_inventory * mid_price)
@@ -108,6 +169,24 @@ class GymTradingEnvironment(gym.Env):
         
         return self._get_obs(), reward, terminated, truncated, info
 
+    def _advance(self, action):
+        # Places the action's order and simulates one second of market time.
+        # Returns the pre-step mid used to mark the portfolio.
+        fixed_qty = 10 
+        snap = self.order_book.get_snapshot()
+        mid_price = snap['mid_price'] if snap['mid_price'] > 0 else 100.0
+        
+        aggressive_offset = 0.05 
+        if action == 1: 
+            price = self.order_book.quantize(mid_price + aggressive_offset)
+            self._place_order('buy', price, fixed_qty)
+        elif action == 2: 
+            price = self.order_book.quantize(mid_price - aggressive_offset)
+            self._place_order('sell', price, fixed_qty)
+            
+        self.loop.run_until(self.loop.current_time + 1.0)
+        return mid_price
+
     def _get_obs(self):
         snap = self.order_book.get_snapshot()
         mid = snap['mid_price'] if snap['mid_price'] > 0 else 100.0
@@ -121,62 +200,20 @@ class GymTradingEnvironment(gym.Env):
         return np.array([rel_bid, rel_ask, rel_spread, norm_inventory, norm_cash], dtype=np.float32)
 
     def _place_order(self, side, price, qty):
-        def execute():
-            unique_id = int(self.loop.current_time * 1000000) + random.randint(0, 1000)
-            order = Order(
-                agent_id="Insider",
-                side=side,
-                price=price,
-                qty=qty,
-                order_type='limit',
-                timestamp=self.loop.current_time,
-                order_id=f"RL_{unique_id}"
-            )
-            self.order_book.add_order(order)
-        self.loop.schedule(0.05, execute)
-
-    def _process_fills(self):
-        current_tape = self.order_book.tape
-        for i in range(self.tape_reader_index, len(current_tape)):
-            trade = current_tape[i]
-            if trade.buyer_id == "Insider":
-                self.insider_inventory += trade.qty
-                self.cash_balance -= trade.qty * trade.price
-            elif trade.seller_id == "Insider":
-                self.insider_inventory -= trade.qty
-                self.cash_balance += trade.qty * trade.price
-        self.tape_reader_index = len(current_tape)
+        self.loop.schedule(0.05, self._submit_insider, args=(side, price, qty))
+
+    def _submit_insider(self, side, price, qty):
+        self.order_book.submit("Insider", side, qty, price, 'limit', self.loop.current_time)
 
     def _background_agent_step(self):
-        agent = random.choice(self.agents)
+        agent = self.rng.choice(self.agents)
         snap = self.order_book.get_snapshot()
         actions = agent.act(snap)
         
         if isinstance(actions, dict): actions = [actions]
         elif actions is None: actions = []
 
-        for action in actions:
-            if action['type'] == 'CANCEL':
-                self.order_book.cancel_order(action['order_id'])
-            else:
-                order_type_str = action.get('type', 'limit')
-                if '_' in order_type_str:
-                     order_type = order_type_str.split('_')[-1].lower()
-                else:
-                     order_type = order_type_str.lower()
-                
-                oid = action.get('order_id', f"{action['agent_id']}_{random.randint(0, 1000000000)}")
-
-                o = Order(
-                    agent_id=action['agent_id'],
-                    side=action['side'],
-                    qty=action['qty'],
-                    price=action.get('price'),
-                    order_type=order_type,
-                    timestamp=self.loop.current_time,
-                    order_id=oid
-                )
-                self.order_book.add_order(o)
+        if actions:
+            self.order_book.submit_batch(actions, self.loop.current_time)
             
-        next_delay = random.uniform(0.01, 0.1) 
-        self.loop.schedule(next_delay, self._background_agent_step)
\ No newline at end of file
+        return self.rng.uniform(0.01, 0.1)
\ No newline at end of file
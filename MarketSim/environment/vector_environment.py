@@ -0,0 +1,120 @@
+import numpy as np
+from gymnasium.vector import VectorEnv, AutoresetMode
+from gymnasium.vector.utils import batch_space
+
+from .market_environment import GymTradingEnvironment
+
+class VectorTradingEnvironment(VectorEnv):
+    # N independent markets in one process. Each market keeps its own event
+    # loop, engine and agents (a GymTradingEnvironment used as a container);
+    # portfolio tracking, reward and observation math run on (N,) arrays.
+    # Finished sub-envs are reset on the following step (next-step autoreset).
+    metadata = {'render_modes': [], 'autoreset_mode': AutoresetMode.NEXT_STEP}
+
+    INFO_KEYS = ('pnl', 'drawdown', 'inventory', 'reward_pnl_component', 'reward_penalty_component')
+
+    def __init__(self, num_envs=8, tick_size=0.01, warm_cache_size=16, warm_pool=0, tape_size=10000):
+        self.num_envs = num_envs
+        self.markets = [GymTradingEnvironment(tick_size=tick_size, warm_cache_size=warm_cache_size,
+                                              warm_pool=warm_pool, tape_size=tape_size)
+                        for _ in range(num_envs)]
+
+        self.single_observation_space = self.markets[0].observation_space
+        self.single_action_space = self.markets[0].action_space
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+        self.max_steps = self.markets[0].max_steps
+        self.risk_aversion = self.markets[0].risk_aversion
+        self.initial_value = 100000.0
+
+        self.portfolio_value = np.full(num_envs, self.initial_value)
+        self.peak_portfolio_value = np.full(num_envs, self.initial_value)
+        self.max_drawdown = np.zeros(num_envs)
+        self._autoreset = np.zeros(num_envs, dtype=bool)
+
+    def _reset_state(self, mask):
+        self.portfolio_value[mask] = self.initial_value
+        self.peak_portfolio_value[mask] = self.initial_value
+        self.max_drawdown[mask] = 0.0
+
+    def reset(self, *, seed=None, options=None):
+        self._np_random_seed = seed
+        for i, market in enumerate(self.markets):
+            market.reset(seed=None if seed is None else seed + i, options=options)
+        self._reset_state(slice(None))
+        self._autoreset[:] = False
+        return self._get_obs(), {}
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        n = self.num_envs
+        mids = np.empty(n)
+        for i, market in enumerate(self.markets):
+            if self._autoreset[i]:
+                market.reset()
+                mids[i] = np.nan
+            else:
+                mids[i] = market._advance(int(actions[i]))
+        resetting = self._autoreset.copy()
+        self._reset_state(resetting)
+
+        inventory = np.array([m.insider_inventory for m in self.markets], dtype=np.float64)
+        cash = np.array([m.cash_balance for m in self.markets], dtype=np.float64)
+        times = np.array([m.loop.current_time for m in self.markets])
+
+        prev_value = self.portfolio_value
+        value = np.where(resetting, prev_value, cash + inventory * mids)
+        pnl_diff = (value - prev_value) / 100.0
+
+        self.peak_portfolio_value = np.maximum(self.peak_portfolio_value, value)
+        current_drawdown = (self.peak_portfolio_value - value) / self.peak_portfolio_value
+        self.max_drawdown = np.maximum(self.max_drawdown, current_drawdown)
+        self.portfolio_value = value
+
+        drawdown_penalty = current_drawdown * 10.0
+        inventory_penalty = (inventory / 100.0) ** 2
+        penalty = drawdown_penalty + inventory_penalty
+        rewards = np.where(resetting, 0.0, pnl_diff - self.risk_aversion * penalty)
+
+        terminations = ~resetting & (cash <= 0)
+        truncations = ~resetting & (times >= self.max_steps + 20.0)
+        self._autoreset = terminations | truncations
+
+        stepped = ~resetting
+        infos = {
+            'pnl': value - self.initial_value,
+            'drawdown': current_drawdown,
+            'inventory': inventory,
+            'reward_pnl_component': pnl_diff,
+            'reward_penalty_component': penalty,
+        }
+        for key in self.INFO_KEYS:
+            infos[f'_{key}'] = stepped
+
+        return self._get_obs(), rewards, terminations, truncations, infos
+
+    def _get_obs(self):
+        snaps = [m.order_book.get_snapshot() for m in self.markets]
+        best_bid = np.array([s['best_bid'] for s in snaps])
+        best_ask = np.array([s['best_ask'] for s in snaps])
+        spread = np.array([s['spread'] for s in snaps])
+        mid = np.array([s['mid_price'] for s in snaps])
+        mid = np.where(mid > 0, mid, 100.0)
+        inventory = np.array([m.insider_inventory for m in self.markets], dtype=np.float64)
+        cash = np.array([m.cash_balance for m in self.markets], dtype=np.float64)
+
+        with np.errstate(invalid='ignore'):
+            rel_bid = np.where(best_bid != 0, (best_bid - mid) / mid, 0.0)
+            rel_ask = np.where(best_ask != 0, (best_ask - mid) / mid, 0.0)
+        obs = np.empty((self.num_envs, 5), dtype=np.float32)
+        obs[:, 0] = rel_bid
+        obs[:, 1] = rel_ask
+        obs[:, 2] = spread / mid
+        obs[:, 3] = inventory / 100.0
+        obs[:, 4] = (cash - self.initial_value) / 10000.0
+        return obs
+
+    def close_extras(self, **kwargs):
+        for market in self.markets:
+            market.close()
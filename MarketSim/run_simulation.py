@@ -1,51 +1,111 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from matplotlib.backends.backend_pdf import PdfPages
 from engine.matching_engine import MatchingEngine
-from engine.event_loop import EventLoop
+from engine.event_loop import EVENT_LOOPS
+from engine.arrivals import PoissonArrivals
+from engine.ledger import Ledger
+from engine.random_stream import RandomStream
 from agents.agents import MarketMaker, NoiseTrader, MomentumTrader
+from agents.pools import NoiseTraderPool, MarketMakerPool
+from agents.indicators import MarketHistory
 from analytics.tape import Tape
 from analytics.snapshots import SnapshotRecorder
 from analytics.plots import MarketPlots
-import random
-from engine.order import Order
+from analytics.store import RunWriter, RunReader
 
-def run_scenario(pdf, scenario_name, noise_count, mm_count, mom_count):
-    order_book = MatchingEngine()
-    loop = EventLoop()
-    tape = Tape()
-    recorder = SnapshotRecorder()
-    
-    fv_process = FairvalueProcess(initial_value=100.0, mu=0.0, sigma=0.0005)
+SCENARIOS = [
+    ("Scenario A: Noise Only", 100, 0, 0),
+    ("Scenario B: Noise + Market Makers", 80, 20, 0),
+    ("Scenario C: Noise + Momentum", 80, 0, 20)
+]
+
+def run_scenario(pdf, scenario_name, noise_count, mm_count, mom_count, book_type='ladder', tick_size=0.01, seed=42,
+                 run_dir=None):
+    recorder, tape = simulate_scenario(scenario_name, noise_count, mm_count, mom_count,
+                                       book_type=book_type, tick_size=tick_size, seed=seed, run_dir=run_dir)
+    plotter = MarketPlots(recorder, tape)
+    plotter.generate_scenario_report(pdf, scenario_name)
+
+def simulate_scenario(scenario_name, noise_count, mm_count, mom_count, book_type='ladder', tick_size=0.01,
+                      seed=42, duration=3600.0, noise_sigma=0.5, mm_skew=0.01, lambda_rate=15, verbose=True,
+                      agent_pools=False, loop_type='heap', rate_fn=None, metrics=None, tape_size=None, run_dir=None,
+                      flow_log=None, stats=None):
+    # With run_dir, trades and snapshots are streamed to disk chunk by chunk
+    # and the returned recorder / tape are lazy readers over that directory.
+    writer = RunWriter(run_dir) if run_dir is not None else None
+    tape = Tape(max_size=tape_size, sink=writer)
+    # flow_log (an OrderFlowLog) records the order flow for replay_log.
+    order_book = MatchingEngine(book_type=book_type, tape=tape, tick_size=tick_size, flow_log=flow_log)
+    loop = EVENT_LOOPS[loop_type]()
+    if stats is not None:
+        # An Instrumentation; book depth is sampled once per simulated second.
+        stats.attach(engine=order_book, loop=loop, depth_interval=1.0)
+    ledger = Ledger()
+    order_book.subscribe(ledger.on_fill)
+    recorder = SnapshotRecorder(sink=writer)
+    if metrics is not None:
+        # e.g. a StreamingMetrics, kept current while the session runs
+        order_book.subscribe(metrics.on_fill)
+        recorder.subscribe(metrics.on_snapshot)
     
-    np.random.seed(42)
-    random.seed(42)
+    # One stream for the run (arrivals, agent selection, fair value) and an
+    # independent child stream per agent, all derived from `seed`. Agent
+    # streams use small blocks so large populations stay cheap in memory;
+    # pools share one stream each, so only the streams used are spawned.
+    rng = RandomStream(seed)
+    population = noise_count + mm_count + mom_count
+    streams = 2 + mom_count if agent_pools else population
+    agent_rngs = iter(rng.spawn(streams, block_size=64))
+    fv_process = FairvalueProcess(initial_value=100.0, mu=0.0, sigma=0.0005, rng=rng)
     
+    # With agent_pools, noise traders and market makers are array-backed
+    # populations (one stream each) instead of one object per agent.
+    pools = []
     agents = []
-    for i in range(noise_count):
-        agents.append(NoiseTrader(f"NT_{i}"))
-    for i in range(mm_count):
-        agents.append(MarketMaker(f"MM_{i}", inventory_limit=1000))
+    if agent_pools:
+        noise_pool = NoiseTraderPool(noise_count, sigma=noise_sigma, tick_size=tick_size, rng=next(agent_rngs))
+        mm_pool = MarketMakerPool(mm_count, inventory_limit=1000, skew_factor=mm_skew, tick_size=tick_size,
+                                  rng=next(agent_rngs))
+        pools = [noise_pool, mm_pool]
+        for pool in pools:
+            order_book.subscribe(pool.on_fill)
+    else:
+        for i in range(noise_count):
+            agents.append(NoiseTrader(f"NT_{i}", sigma=noise_sigma, tick_size=tick_size, rng=next(agent_rngs)))
+        for i in range(mm_count):
+            agents.append(MarketMaker(f"MM_{i}", inventory_limit=1000, skew_factor=mm_skew, tick_size=tick_size,
+                                      order_ids=order_book.next_order_id, rng=next(agent_rngs)))
+    # Momentum traders read their SMA off one shared mid-price history, pushed
+    # once per arrival.
+    history = MarketHistory()
     for i in range(mom_count):
-        agents.append(MomentumTrader(f"MOM_{i}"))
+        agents.append(MomentumTrader(f"MOM_{i}", tick_size=tick_size, rng=next(agent_rngs), history=history))
+    for agent in agents:
+        ledger.register(agent)
     
-    def background_step():
-        lambda_rate = 15
-        arrival_delay = np.random.exponential(1/lambda_rate)
-        current_fv = fv_process.step(arrival_delay)
-        
-        for trade in order_book.tape:
-            for agent in agents:
-                if trade.buyer_id == agent.agent_id:
-                    agent.inventory += trade.qty
-                    agent.balance -= trade.qty * trade.price
-                elif trade.seller_id == agent.agent_id:
-                    agent.inventory -= trade.qty
-                    agent.balance += trade.qty * trade.price
-        order_book.tape.clear()
+    last_arrival = 0.0
 
-        agent = random.choice(agents)
+    def background_step(k):
+        # Called by the arrival stream with the index of the picked agent.
+        nonlocal last_arrival
+        current_fv = fv_process.step(loop.current_time - last_arrival)
+        last_arrival = loop.current_time
+        
         snap = order_book.get_snapshot()
+        history.push(snap['mid_price'])
         
+        for pool in pools:
+            if k < len(pool):
+                if isinstance(pool, NoiseTraderPool):
+                    snap['fair_value'] = current_fv
+                pool.submit(order_book, snap, [k], loop.current_time)
+                return
+            k -= len(pool)
+
+        agent = agents[k]
         if isinstance(agent, NoiseTrader):
             snap['fair_value'] = current_fv
         else:
@@ -55,36 +115,19 @@ def run_scenario(pdf, scenario_name, noise_count, mm_count, mom_count):
         
         if action:
             intents = [action] if isinstance(action, dict) else action
-            for item in intents:
-                # --- FIX 2: HANDLE CANCELLATIONS ---
-                if item.get('type') == 'CANCEL':
-                    order_book.cancel_order(item['order_id'])
-                    continue
-
-                if isinstance(item, dict):
-                    t_str = item.get('type', 'PLACE_LIMIT')
-                    order_type = t_str.split('_')[1].lower() if '_' in t_str else 'limit'
-
-                    oid = item.get('order_id', f"sys_{random.randint(0, 10**9)}")
+            order_book.submit_batch(intents, loop.current_time)
 
-                    new_order = Order(
-                        agent_id=item['agent_id'],
-                        order_id=oid,  # Pass the ID explicitly
-                        side=item['side'],
-                        qty=item['qty'],
-                        price=item.get('price'),
-                        order_type=order_type,
-                        timestamp=loop.current_time
-                    )
-                    order_book.add_order(new_order)
-
-        loop.schedule(arrival_delay, background_step)
-
-    print(f"  > Warming up {scenario_name}...")
+    if verbose:
+        print(f"  > Warming up {scenario_name}...")
     for _ in range(100): 
+        if agent_pools:
+            if not mm_count: break
+            snap = order_book.get_snapshot()
+            mm_pool.submit(order_book, snap, [rng.randint(0, mm_count - 1)], cancel=False)
+            continue
         mm_agents = [a for a in agents if isinstance(a, MarketMaker)]
         if not mm_agents: break
-        agent = random.choice(mm_agents)
+        agent = rng.choice(mm_agents)
         snap = order_book.get_snapshot()
         if snap['mid_price'] == 100.0 and snap['spread'] == 0:
             snap['mid_price'] = 100.0
@@ -92,45 +135,72 @@ def run_scenario(pdf, scenario_name, noise_count, mm_count, mom_count):
         
         action = agent.act(snap)
         if action:
-            for item in action:
-                if item.get('type') == 'CANCEL': continue
-                oid = item.get('order_id', f"wu_{random.randint(0, 1000000000)}")
-                o = Order(item['agent_id'], item['side'], item['qty'], item['price'], order_id=oid)
-                order_book.add_order(o)
+            order_book.submit_batch([item for item in action if item.get('type') != 'CANCEL'])
 
-    loop.schedule(0, background_step)
+    # Arrival times and agent picks are pre-drawn in blocks and merged into
+    # the loop as a sorted stream. rate_fn (vectorized t -> rate, bounded by
+    # lambda_rate) gives a time-varying intensity.
+    arrivals = PoissonArrivals(lambda_rate, population, rng=rng.spawn(1)[0], rate_fn=rate_fn, end=duration)
+    loop.add_stream(arrivals, background_step)
     
     def record_tick():
         recorder.record_snapshot(order_book, loop.current_time)
-        loop.schedule(1.0, record_tick)
-    
-    loop.schedule(1.0, record_tick)
-    loop.run_until(3600.0)
     
-    plotter = MarketPlots(recorder, tape)
-    plotter.generate_scenario_report(pdf, scenario_name)
+    loop.schedule_periodic(1.0, record_tick)
+    loop.run_until(duration)
+    if writer is not None:
+        writer.close(tape, recorder)
+        reader = RunReader(run_dir)
+        return reader.snapshots, reader.trades
+    return recorder, tape
+
+def _report_worker(args):
+    name, n, mm, mom, kwargs = args
+    recorder, tape = simulate_scenario(name, n, mm, mom, **kwargs)
+    return MarketPlots(recorder, tape).prepare_report(name)
+
+def _scenario_dir(run_dir, index):
+    return None if run_dir is None else os.path.join(run_dir, f"scenario_{index}")
+
+def run_scenarios_parallel(pdf, scenarios=SCENARIOS, max_workers=None, run_dir=None, **kwargs):
+    # Each worker simulates a scenario (into its own subdirectory of run_dir,
+    # if given) and prepares its report page: OHLC bars and the decimated
+    # spread series, so only that small report is sent back. Pages are drawn
+    # here as the reports arrive, in scenario order, so the PDF matches a
+    # serial run.
+    jobs = [(name, n, mm, mom, dict(kwargs, run_dir=_scenario_dir(run_dir, i)))
+            for i, (name, n, mm, mom) in enumerate(scenarios)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for report in executor.map(_report_worker, jobs):
+            if report is not None:
+                MarketPlots.render_report(pdf, report)
 
 class FairvalueProcess:
-    def __init__(self, initial_value=100.0, mu=0.0, sigma=0.0005):
+    def __init__(self, initial_value=100.0, mu=0.0, sigma=0.0005, rng=None):
         self.current_value = initial_value
         self.mu = mu
         self.sigma = sigma
+        self.rng = rng if rng is not None else RandomStream()
     
     def step(self, dt):
-        dW = np.random.normal(0, np.sqrt(dt))
+        dW = self.rng.normal(0, np.sqrt(dt))
         self.current_value *= np.exp((self.mu - 0.5 * self.sigma**2) * dt + self.sigma * dW)
         return self.current_value
 
-def main():
+def main(parallel=True, max_workers=None, run_dir=None):
     with PdfPages('simulation_report.pdf') as pdf:
-        scenarios = [
-            ("Scenario A: Noise Only", 100, 0, 0),
-            ("Scenario B: Noise + Market Makers", 80, 20, 0),
-            ("Scenario C: Noise + Momentum", 80, 0, 20)
-        ]
-        
-        for name, n, mm, mom in scenarios:
-            run_scenario(pdf, name, n, mm, mom)
+        if parallel:
+            run_scenarios_parallel(pdf, SCENARIOS, max_workers=max_workers, run_dir=run_dir)
+            return
+
+        for i, (name, n, mm, mom) in enumerate(SCENARIOS):
+            run_scenario(pdf, name, n, mm, mom, run_dir=_scenario_dir(run_dir, i))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the market scenarios and write simulation_report.pdf")
+    parser.add_argument('--serial', action='store_true', help="run scenarios one after another in this process")
+    parser.add_argument('--workers', type=int, default=None, help="process pool size (default: one per core)")
+    parser.add_argument('--run-dir', default=None,
+                        help="stream trades and snapshots to this directory instead of keeping them in memory")
+    args = parser.parse_args()
+    main(parallel=not args.serial, max_workers=args.workers, run_dir=args.run_dir)
\ No newline at end of file
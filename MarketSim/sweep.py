@@ -0,0 +1,143 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from analytics.metrics import StreamingMetrics
+from run_simulation import simulate_scenario
+
+# Values per swept parameter. Grid mode takes the product of the lists;
+# random mode samples each parameter from its list, or uniformly from a
+# (low, high) tuple.
+DEFAULT_SPACE = {
+    'noise_count': [60, 80, 100],
+    'mm_count': [0, 10, 20],
+    'mom_count': [0, 10, 20],
+    'noise_sigma': [0.25, 0.5, 1.0],
+    'mm_skew': [0.005, 0.01, 0.02],
+    'lambda_rate': [10, 15, 20],
+}
+
+FIELDS = [
+    'config_id', 'seed', 'noise_count', 'mm_count', 'mom_count', 'noise_sigma', 'mm_skew', 'lambda_rate',
+    'duration', 'avg_spread', 'vwap', 'volatility', 'fill_count', 'volume', 'run_time'
+]
+
+def config_id(params):
+    blob = json.dumps(params, sort_keys=True)
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+def grid_configs(space):
+    # A (low, high) range has no grid points; only explicit lists are gridded.
+    ranges = sorted(name for name, values in space.items() if isinstance(values, tuple))
+    if ranges:
+        raise ValueError(f"Grid mode needs explicit value lists, got (low, high) ranges for {ranges}")
+    names = sorted(space)
+    return (dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names)))
+
+def random_configs(space, n_samples, search_seed=0):
+    rng = np.random.default_rng(search_seed)
+    for _ in range(n_samples):
+        params = {}
+        for name in sorted(space):
+            values = space[name]
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = int(rng.integers(low, high + 1))
+                else:
+                    params[name] = float(rng.uniform(low, high))
+            else:
+                params[name] = values[int(rng.integers(len(values)))]
+        yield params
+
+def run_config(params):
+    # Headless run: no plotting and no trade tape; the summary row comes from
+    # metrics streamed while the session runs.
+    metrics = StreamingMetrics()
+    start = time.perf_counter()
+    simulate_scenario(f"sweep {params['config_id']}", params['noise_count'], params['mm_count'],
+                      params['mom_count'], seed=params['seed'], duration=params['duration'],
+                      noise_sigma=params['noise_sigma'], mm_skew=params['mm_skew'],
+                      lambda_rate=params['lambda_rate'], verbose=False, metrics=metrics, tape_size=0)
+    run_time = time.perf_counter() - start
+
+    row = dict(params)
+    row.update({
+        'avg_spread': metrics.get_average_spread(),
+        'vwap': metrics.compute_vwap(),
+        'volatility': metrics.get_session_volatility(),
+        'fill_count': metrics.trade_count,
+        'volume': metrics.volume,
+        'run_time': run_time,
+    })
+    return row
+
+def completed_ids(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline='') as f:
+        return {row['config_id'] for row in csv.DictReader(f)}
+
+def run_sweep(out_path, configs, seeds=3, duration=3600.0, max_workers=None):
+    # Results are appended to out_path as each run finishes, so an interrupted
+    # sweep can be restarted with the same arguments and will skip every
+    # (config, seed) pair already in the file.
+    done = completed_ids(out_path)
+    jobs = []
+    for params in configs:
+        for seed in range(seeds):
+            job = dict(params, seed=seed, duration=duration)
+            job['config_id'] = config_id(job)
+            if job['config_id'] not in done:
+                jobs.append(job)
+
+    print(f"Sweep: {len(jobs)} runs to do, {len(done)} already in {out_path}")
+    new_file = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+    with open(out_path, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        if new_file:
+            writer.writeheader()
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(run_config, job) for job in jobs]
+            for i, future in enumerate(as_completed(futures), 1):
+                writer.writerow(future.result())
+                f.flush()
+                print(f"  [{i}/{len(jobs)}] done")
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo parameter sweep over agent mixes")
+    parser.add_argument('--out', default='sweep_results.csv', help="CSV results table (appended to, resumable)")
+    parser.add_argument('--space', default=None,
+                        help='JSON file mapping parameter -> list of values, or {"low": x, "high": y} for random mode')
+    parser.add_argument('--mode', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--samples', type=int, default=20, help="configurations drawn in random mode")
+    parser.add_argument('--search-seed', type=int, default=0)
+    parser.add_argument('--seeds', type=int, default=3, help="simulation seeds per configuration")
+    parser.add_argument('--duration', type=float, default=3600.0, help="simulated seconds per run")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    space = dict(DEFAULT_SPACE)
+    if args.space:
+        with open(args.space) as f:
+            for name, values in json.load(f).items():
+                space[name] = (values['low'], values['high']) if isinstance(values, dict) else values
+
+    if args.mode == 'grid':
+        try:
+            configs = grid_configs(space)
+        except ValueError as e:
+            parser.error(f"{e}; use --mode random or list the values")
+    else:
+        configs = random_configs(space, args.samples, args.search_seed)
+    run_sweep(args.out, configs, seeds=args.seeds, duration=args.duration, max_workers=args.workers)
+
+if __name__ == "__main__":
+    main()
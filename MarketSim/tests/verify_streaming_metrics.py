@@ -0,0 +1,45 @@
+import math
+import sys
+from analytics.metrics import MarketMetrics, StreamingMetrics
+from run_simulation import SCENARIOS, simulate_scenario
+
+# StreamingMetrics, updated fill by fill and snapshot by snapshot, must agree
+# with the batch MarketMetrics computed from the full tape and L1 frame.
+
+TOLERANCE = 1e-9
+
+def close(a, b):
+    if a is None or b is None:
+        return a is b
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return math.isclose(a, b, rel_tol=TOLERANCE, abs_tol=TOLERANCE)
+
+print("--- Streaming Metrics Verification ---")
+
+failures = []
+for name, n, mm, mom in SCENARIOS:
+    for duration in (30.0, 600.0):
+        streaming = StreamingMetrics()
+        recorder, tape = simulate_scenario(name, n, mm, mom, duration=duration, verbose=False, metrics=streaming)
+        df_l1 = recorder.get_l1_dataframe()
+        trades = tape.since(0)
+        rolling = MarketMetrics(df_l1).get_rolling_volatility(streaming.window_size)
+        batch = {
+            'vwap': MarketMetrics(tape).compute_vwap(),
+            'volatility': MarketMetrics(df_l1).get_session_volatility(),
+            'rolling_volatility': float(rolling.iloc[-1]) if len(rolling) else float('nan'),
+            'avg_spread': float(df_l1['spread'].mean()) if not df_l1.empty else float('nan'),
+            'volume': int(trades['qty'].sum()),
+            'fill_count': len(tape),
+        }
+        for metric, value in streaming.summary().items():
+            if not close(value, batch[metric]):
+                failures.append(f"{name} {duration:.0f}s {metric}: {value} vs {batch[metric]}")
+
+for failure in failures:
+    print(failure)
+if failures:
+    print(f"FAILURE: {len(failures)} streaming metrics differ from the batch results.")
+    sys.exit(1)
+print(f"SUCCESS: Streaming metrics match MarketMetrics within {TOLERANCE:g}.")
@@ -0,0 +1,43 @@
+import sys
+import numpy as np
+from environment.market_environment import GymTradingEnvironment
+
+# Warm starts must be invisible: an env restoring cached post-warm-up state
+# has to produce exactly the episodes of an env that simulates every warm-up.
+
+def episode(env, seed, steps=300):
+    obs, _ = env.reset(seed=seed)
+    trace = [obs.tobytes()]
+    for action in np.random.default_rng(seed).integers(0, 3, steps).tolist():
+        obs, reward, terminated, truncated, info = env.step(action)
+        trace.append((obs.tobytes(), reward, terminated, truncated, tuple(info.values())))
+    trace.append(env.order_book.tape.to_structured().tobytes())
+    return trace
+
+print("--- Warm Start Verification ---")
+
+cold = GymTradingEnvironment(warm_cache_size=0)
+warm = GymTradingEnvironment()
+failures = []
+for seed in (1, 2, 1, 3, 2, 1):
+    if episode(cold, seed) != episode(warm, seed):
+        failures.append(f"seed {seed}")
+
+pooled = GymTradingEnvironment(warm_pool=4)
+unpooled = GymTradingEnvironment(warm_pool=4, warm_cache_size=0)
+pooled.reset(seed=7)
+unpooled.reset(seed=7)
+for i in range(12):
+    a, _ = pooled.reset()
+    b, _ = unpooled.reset()
+    same = a.tobytes() == b.tobytes()
+    for action in (1, 2, 0, 1):
+        same = same and pooled.step(action)[0].tobytes() == unpooled.step(action)[0].tobytes()
+    if not same:
+        failures.append(f"warm_pool reset {i}")
+
+print(f"Cached market seeds: {len(warm.warm_cache)} seeded, {len(pooled.warm_cache)} pooled")
+if failures:
+    print(f"FAILURE: warm and cold resets differ ({', '.join(failures)}).")
+    sys.exit(1)
+print("SUCCESS: Warm resets reproduce cold resets exactly.")